@@ -1,248 +1,501 @@
 
-from othelloboard import OthelloBoard
-from copy import deepcopy
-from math import inf
+from othelloboard import OthelloBoard, SQUARES, indices
+from evaluation import MOVE_WEIGHTS, EVALUATORS
+from transposition import TranspositionTable, EXACT, LOWER, UPPER
+from parallel import ParallelSearch
+from endgame import EndgameSolver, SolverTimeout
+from ordering import ORDERINGS
+from algorithms import ALGORITHMS
+from stats import SearchStats
+import probcut
+from math import inf, nextafter
 from time import time
 
 
+class _SearchTimeout(Exception):
+    pass
+
+
 class Ai(object):
 
-    def __init__(self, board, player, time_limit):
+    # Seconds kept free of the time limit for returning the move, and the
+    # number of nodes searched between two clock checks.
+    safety_margin = 0.05
+    check_interval = 32
+    # Half-width of the aspiration window around the previous iteration.
+    aspiration = 1000
+    # Whether table values from deeper searches answer shallower ones.
+    # Without it, values come from searches of the same depth only and
+    # table moves still order the search, so scores do not depend on what
+    # was searched before.
+    reuse_deeper = True
+
+    def __init__(self, board, player, time_limit, table_mb=16, workers=1,
+                 endgame_empties=12, evaluation='standard', book=None,
+                 ordering='killer', algorithm='alphabeta', on_iteration=None,
+                 selectivity=None):
         self.board = board
         self.player = player
         self.time_limit = time_limit
+        self.book = book
+        self.evaluation = evaluation
+        self._evaluate = EVALUATORS[evaluation]
+        self.ordering_name = ordering
+        self.ordering = ORDERINGS[ordering]()
+        self.algorithm = algorithm
+        self.search = ALGORITHMS[algorithm]()
+        self.endgame_empties = endgame_empties
+        self.solver = EndgameSolver()
+        self.table_mb = table_mb
+        self.table = TranspositionTable(table_mb) if table_mb else None
+        self.workers = workers
+        # Multi-ProbCut cut tests when selectivity is set; see probcut.py.
+        self.selectivity = selectivity
+        self.probcut = (None if selectivity is None else
+                        probcut.ProbCut(probcut.default_table(), selectivity))
+        self.on_iteration = on_iteration
+        self.stats = None
+        # Deepest result per position hash found by ponder.
+        self.pondered = {}
+        self.nodes = 0
+        self.leaf_evals = 0
+        self._deadline = inf
+        self._root_depth = inf
+        self._parallel = None
+        # Set in parallel workers: the parent's flag cancelling their moves.
+        self._cancel_flag = None
+
+    def close(self):
+        if self._parallel is not None:
+            self._parallel.shutdown()
+            self._parallel = None
+
+    def cancel(self):
+        # Makes a running search give up at its next clock check; safe to
+        # call from another thread.
+        self._deadline = -inf
+        self.solver._deadline = -inf
+        if self._parallel is not None:
+            self._parallel.cancel()
+
+    def _new_search(self, deadline=inf):
+        self.nodes = 0
+        self.leaf_evals = 0
+        self._deadline = deadline
+        self._root_depth = inf
+        if self._parallel is not None:
+            self._parallel.new_search()
+        self.ordering.new_search()
+        if self.table is not None:
+            self.table.new_search()
+        self.stats = SearchStats(self)
+
+    def _iteration_done(self, depth, score, move):
+        iteration = self.stats.iteration(self, depth, score, move)
+        if self.on_iteration is not None:
+            self.on_iteration(iteration)
+
+    def _book_move(self, board):
+        if self.book is None or board.current_player != self.player:
+            return None
+        entry = self.book.probe(board)
+        if entry is None or not board.move_mask(self.player) >> entry[1] & 1:
+            return None
+        return entry[1]
+
+    def best_move(self, depth=5):
+        self._new_search()
+        move = self._fixed_depth_search(self.board.copy(), depth)
+        self.stats.finish(self)
+        return None if move is None else SQUARES[move]
 
-    def best_move(self):
-        _, move = self._minimax(self.board, 5, -inf, inf, self.player)
+    def _fixed_depth_search(self, board, depth):
+        move = self._book_move(board)
+        if move is not None:
+            self.stats.source = 'book'
+        elif (board.current_player == self.player and
+                self._empties(board) <= self.endgame_empties):
+            self.stats.source = 'solver'
+            self.stats.score, move = self.solver.solve(board, self.player)
+            self.stats.solver_nodes = self.solver.nodes
+        else:
+            score, move = self._root_search(board, depth, None, None)
+            self._iteration_done(depth, score, move)
         return move
 
+    def _empties(self, board):
+        return 64 - board.score[1] - board.score[-1]
+
     def time_limit_move(self):
-        depth = 3
         start_time = time()
-        _, move = self._minimax(self.board, depth, -inf, inf, self.player)
-        passed_time = time()-start_time
-        while(passed_time < self.time_limit/2):
+        self._new_search(start_time + self.time_limit - self.safety_margin)
+        move = self._timed_search(self.board.copy(), start_time)
+        self.stats.finish(self)
+        return None if move is None else SQUARES[move]
+
+    def _timed_search(self, board, start_time):
+        move = self._book_move(board)
+        if move is not None:
+            self.stats.source = 'book'
+            return move
+        moves = self._evaluate_moves(indices(board.move_mask(self.player)))
+        if len(moves) <= 1:
+            self.stats.source = 'forced'
+            return moves[0] if moves else None
+        move = moves[0]
+        empties = self._empties(board)
+        score = None
+        depth = 0
+        pondered = self.pondered.get(board.hash)
+        if (pondered is not None and
+                board.move_mask(self.player) >> pondered[2] & 1):
+            # Pondering got this far on the opponent's time: answer at once
+            # if it was solved, otherwise deepen from there.
+            depth, score, move = pondered
+            if depth >= empties:
+                self.stats.source = 'ponder'
+                self.stats.score = score
+                return move
+        elif empties <= self.endgame_empties:
+            # Perfect play if the solver finishes in half the budget,
+            # otherwise the remaining time goes to the heuristic search.
+            try:
+                self.stats.score, move = self.solver.solve(
+                    board, self.player,
+                    deadline=min(self._deadline,
+                                 start_time + self.time_limit/2))
+                self.stats.source = 'solver'
+                return move
+            except SolverTimeout:
+                pass
+            finally:
+                self.stats.solver_nodes = self.solver.nodes
+        passed_time = 0
+        while passed_time < self.time_limit/2 and depth < empties:
             depth += 1
-            _, move = self._minimax(
-                self.board, depth, -inf, inf, self.player)
+            try:
+                score, move = self._root_search(board, depth, score, move)
+            except _SearchTimeout:
+                break
+            self._iteration_done(depth, score, move)
             passed_time = time() - start_time
         return move
 
-    def _evaluate_moves(self, moves):
-        def get_weight(move):
-            weights = {
-                'A1': 200, 'B1': -100, 'C1': 100,  'D1': 50,
-                'E1': 50, 'F1': 100, 'G1': -100,  'H1': 200,
-                'A2': -100, 'B2': -200, 'C2': -50, 'D2': -50,
-                'E2': -50, 'F2': -50, 'G2': -200, 'H2': -100,
-                'A3': 100,  'B3': -50, 'C3': 100,   'D3': 0,
-                'E3': 0, 'F3': 100,  'G3': -50,  'H3': 100,
-                'A4': 50,  'B4': -50,   'C4': 0,   'D4': 0,
-                'E4': 0,   'F4': 0,  'G4': -50,   'H4': 50,
-                'A5': 50,  'B5': -50,   'C5': 0,   'D5': 0,
-                'E5': 0,   'F5': 0,  'G5': -50,   'H5': 50,
-                'A6': 100,  'B6': -50, 'C6': 100,   'D6': 0,
-                'E6': 0, 'F6': 100,  'G6': -50,  'H6': 100,
-                'A7': -100, 'B7': -200, 'C7': -50, 'D7': -50,
-                'E7': -50, 'F7': -50, 'G7': -200, 'H7': -100,
-                'A8': 200, 'B8': -100, 'C8': 100,  'D8': 50,
-                'E8': 50, 'F8': 100, 'G8': -100,  'H8': 200,
-            }
-            return weights[move]
-        return sorted(moves, key=get_weight, reverse=True)
-
-    def _minimax(self, board, depth, alpha, beta, player):
+    def multi_pv(self, k=None, depth=None):
+        # The k best moves of the player to move on self.board, all of them
+        # with k None, best first: dicts of move, score, principal variation
+        # and depth. Scores are from self.player's view even when the
+        # opponent is to move, so then the lowest comes first. Searches to
+        # depth, or deepens within the time limit like time_limit_move and
+        # returns the last completed iteration.
+        if k is not None and k < 1:
+            raise ValueError('multi_pv needs k >= 1, not %r' % k)
+        start_time = time()
+        if depth is None:
+            self._new_search(start_time + self.time_limit -
+                             self.safety_margin)
+        else:
+            self._new_search()
+        board = self.board.copy()
+        lines = []
+        if board.current_player != 0:
+            moves = self._evaluate_moves(indices(board.move_mask(
+                board.current_player)))
+            empties = self._empties(board)
+            limit = empties if depth is None else min(depth, empties)
+            done = 0
+            while done < limit and (depth is not None or
+                                    time() - start_time < self.time_limit/2):
+                try:
+                    lines, others = self._multi_pv(board, done + 1, moves,
+                                                   k)
+                except _SearchTimeout:
+                    break
+                done += 1
+                moves = [line[1] for line in lines] + others
+                if self.table is not None:
+                    # The first line is exact, and so is the root value.
+                    self.table.store(board.hash, done, lines[0][0], EXACT,
+                                     lines[0][1])
+                self._iteration_done(done, lines[0][0], lines[0][1])
+            lines = [{'move': SQUARES[move], 'score': score, 'depth': done,
+                      'pv': [SQUARES[i] for i in pv]}
+                     for score, move, pv in lines]
+        self.stats.finish(self)
+        return lines
+
+    def _multi_pv(self, board, depth, moves, k):
+        # Each root move is searched with alpha at the k-th best exact score
+        # so far: a move failing low there cannot make the top k, so only
+        # the others cost a full search. With the table shared between the
+        # moves, this is much cheaper than a full window per move. For the
+        # opponent the same holds with beta and the k-th lowest score.
+        sign = 1 if board.current_player == self.player else -1
+        lines = []
+        others = []
+        threshold = -inf
+        for move in moves:
+            undo = board.play(move)
+            if sign > 0:
+                score = self._minimax(board, depth-1, threshold, inf,
+                                      self.player)[0]
+            else:
+                score = self._minimax(board, depth-1, -inf, -threshold,
+                                      self.player)[0]
+            if sign * score > threshold:
+                lines.append((score, move,
+                              [move] + self._principal_variation(board,
+                                                                 depth-1)))
+            else:
+                others.append(move)
+            board.undo_move(undo)
+            if k is not None and len(lines) >= k:
+                # A stable sort keeps the search order among equal scores.
+                lines.sort(key=lambda line: -sign * line[0])
+                others.extend(line[1] for line in lines[k:])
+                del lines[k:]
+                threshold = sign * lines[-1][0]
+        lines.sort(key=lambda line: -sign * line[0])
+        return lines, others
+
+    def _principal_variation(self, board, length):
+        # The line of best moves stored in the table from board.
+        pv = []
+        undos = []
+        while len(pv) < length and board.current_player != 0:
+            entry = self.table.probe(board.hash) if self.table else None
+            if (entry is None or entry[3] < 0 or not
+                    board.move_mask(board.current_player) >> entry[3] & 1):
+                break
+            pv.append(entry[3])
+            undos.append(board.play(entry[3]))
+        for undo in reversed(undos):
+            board.undo_move(undo)
+        return pv
+
+    def ponder(self, board, stop, replies=4):
+        # Searches the positions after the opponent's replies on board until
+        # stop is set or cancel is called, leaving the deepest completed
+        # result of each in pondered. All replies get the first iteration,
+        # then only the ones the opponent is likeliest to play, those
+        # scoring lowest for this player.
+        self._new_search()
+        self.pondered.clear()
+        if board.current_player != self.player * -1:
+            return
+        children = []
+        for reply in indices(board.move_mask(board.current_player)):
+            child = board.copy()
+            child.play(reply)
+            if child.current_player == self.player:
+                children.append([child, None, None])
+        try:
+            for entry in children:
+                child = entry[0]
+                empties = self._empties(child)
+                if empties <= self.endgame_empties and not stop.is_set():
+                    score, move = self.solver.solve(child, self.player)
+                    self.pondered[child.hash] = (empties, score, move)
+            children = [entry for entry in children
+                        if self._empties(entry[0]) > self.endgame_empties]
+            depth = 0
+            while children and not stop.is_set():
+                depth += 1
+                for entry in children:
+                    child, score, move = entry
+                    score, move = self._root_search(child, depth, score, move)
+                    entry[1:] = score, move
+                    self.pondered[child.hash] = (depth, score, move)
+                children = sorted((entry for entry in children
+                                   if self._empties(entry[0]) > depth),
+                                  key=lambda entry: entry[1])[:replies]
+        except (_SearchTimeout, SolverTimeout):
+            pass
+
+    def _root_search(self, board, depth, guess, first):
+        # ProbCut never cuts the root, which must return a move.
+        self._root_depth = depth
+        if self.workers > 1 and board.current_player == self.player:
+            if self._parallel is None:
+                self._parallel = ParallelSearch(
+                    self.workers, type(self),
+                    {'table_mb': self.table_mb,
+                     'evaluation': self.evaluation,
+                     'ordering': self.ordering_name,
+                     'algorithm': self.algorithm,
+                     'selectivity': self.selectivity})
+            return self._parallel.search(self, board, depth, first,
+                                         self._deadline)
+        return self.search.search(self, board, depth, guess, first)
+
+    def _evaluate_moves(self, moves, first=None):
+        ordered = sorted(moves, key=MOVE_WEIGHTS.__getitem__, reverse=True)
+        if first in ordered:
+            ordered.remove(first)
+            ordered.insert(0, first)
+        return ordered
+
+    def _out_of_time(self):
+        # The clock check: past the deadline, or a parallel worker whose
+        # parent search was cancelled.
+        return (time() > self._deadline or
+                self._cancel_flag is not None and self._cancel_flag.value)
+
+    def _minimax(self, board, depth, alpha, beta, player, first=None):
+        self.nodes += 1
+        if self.nodes % self.check_interval == 0 and self._out_of_time():
+            raise _SearchTimeout()
         if depth == 0 or board.current_player == 0:
             return self._static_evaluation(board, player), None
 
+        hash_move = first
+        if self.table is not None:
+            entry = self.table.probe(board.hash)
+            if entry is not None:
+                entry_depth, value, bound, move = entry
+                if move >= 0:
+                    hash_move = move
+                    if (entry_depth == depth or entry_depth > depth and
+                            self.reuse_deeper) and (
+                            bound == EXACT or
+                            bound == LOWER and value >= beta or
+                            bound == UPPER and value <= alpha):
+                        return value, hash_move
+        if (self.probcut is not None and
+                self.probcut.min_depth <= depth < self._root_depth):
+            value = self.probcut.cut(self, board, depth, alpha, beta, player)
+            if value is not None:
+                return value, hash_move
+        alpha_orig, beta_orig = alpha, beta
+
         if player == board.current_player:
             max_score = -inf
-            for move in self._evaluate_moves(board.moves[player].keys()):
-                temp_board = deepcopy(board)
-                temp_board.apply_move(move)
-                score = self._minimax(temp_board, depth-1,
+            for i, move in enumerate(self.ordering.order(
+                    self, board, indices(board.move_mask(player)), depth,
+                    hash_move, player)):
+                undo = board.play(move)
+                score = self._minimax(board, depth-1,
                                       alpha, beta, player)[0]
+                board.undo_move(undo)
                 if max_score < score:
                     max_score = score
                     best_move = move
                 alpha = max(alpha, score)
                 if beta <= alpha:
+                    self.ordering.cutoff(board, move, i, depth)
                     break
-            return max_score, best_move
+            best_score = max_score
 
         else:
             min_score = inf
-            for move in self._evaluate_moves(board.moves[player*-1]):
-                temp_board = deepcopy(board)
-                temp_board.apply_move(move)
-                score = self._minimax(temp_board, depth-1,     
-                                       alpha, beta, player)[0]
+            for i, move in enumerate(self.ordering.order(
+                    self, board, indices(board.move_mask(player*-1)), depth,
+                    hash_move, player)):
+                undo = board.play(move)
+                score = self._minimax(board, depth-1,
+                                      alpha, beta, player)[0]
+                board.undo_move(undo)
                 if min_score > score:
                     min_score = score
                     best_move = move
                 beta = min(beta, score)
                 if beta <= alpha:
+                    self.ordering.cutoff(board, move, i, depth)
                     break
-            return min_score, best_move
+            best_score = min_score
 
-    def _static_evaluation(self, board, player):
-        discs = board.score[player] + board.score[player*-1]
-        score = 0
-        if(board.current_player == 0):
-            score += 100000*self._true_score(board, player)
-            return score
-        elif(discs < 19):
-            score += 5*self._mobility(board, player)
-            score += 20*self._position_weights(board, player)
-            score += 10000*self._corners(board, player)
-            score += 10000*self._corner_bonus(board, player)
-            return score
-        elif(discs < 57):
-            score += 10*self._disc_difference(board, player)
-            score += 2*self._mobility(board, player)
-            score += 10*self._position_weights(board, player)
-            score += 100*self._last_disc(board, player)
-            score += 10000*self._corners(board, player)
-            score += 10000*self._corner_bonus(board, player)
-            return score
-        else:
-            score += 500*self._disc_difference(board, player)
-            score += 500*self._last_disc(board, player)
-            score += 10000*self._corners(board, player)
-            score += 10000*self._corner_bonus(board, player)
-            return score
-
-    def _true_score(self, board, player):
-        return board.score[player] - board.score[player * -1]
-
-    def _position_weights(self, board, player):
-        weights = {
-            'A1': 500, 'B1': -100, 'C1': 100,  'D1': 50,
-            'E1': 50, 'F1': 100, 'G1': -100,  'H1': 500,
-            'A2': -100, 'B2': -200, 'C2': -50, 'D2': -50,
-            'E2': -50, 'F2': -50, 'G2': -200, 'H2': -100,
-            'A3': 100,  'B3': -50, 'C3': 100,   'D3': 0,
-            'E3': 0, 'F3': 100,  'G3': -50,  'H3': 100,
-            'A4': 50,  'B4': -50,   'C4': 0,   'D4': 0,
-            'E4': 0,   'F4': 0,  'G4': -50,   'H4': 50,
-            'A5': 50,  'B5': -50,   'C5': 0,   'D5': 0,
-            'E5': 0,   'F5': 0,  'G5': -50,   'H5': 50,
-            'A6': 100,  'B6': -50, 'C6': 100,   'D6': 0,
-            'E6': 0, 'F6': 100,  'G6': -50,  'H6': 100,
-            'A7': -100, 'B7': -200, 'C7': -50, 'D7': -50,
-            'E7': -50, 'F7': -50, 'G7': -200, 'H7': -100,
-            'A8': 500, 'B8': -100, 'C8': 100,  'D8': 50,
-            'E8': 50, 'F8': 100, 'G8': -100,  'H8': 500,
-        }
-
-        if('A1' in board.taken):
-            weights['B1'] = 0
-            weights['C1'] = 0
-            weights['D1'] = 0
-            weights['A2'] = 0
-            weights['B2'] = 0
-            weights['C2'] = 0
-            weights['D2'] = 0
-            weights['A3'] = 0
-            weights['B3'] = 0
-            weights['C3'] = 0
-            weights['A4'] = 0
-            weights['B4'] = 0
-        if('H1' in board.taken):
-            weights['G1'] = 0
-            weights['F1'] = 0
-            weights['E1'] = 0
-            weights['H2'] = 0
-            weights['G2'] = 0
-            weights['F2'] = 0
-            weights['E2'] = 0
-            weights['H3'] = 0
-            weights['G3'] = 0
-            weights['F3'] = 0
-            weights['H4'] = 0
-            weights['G4'] = 0
-        if('A8' in board.taken):
-            weights['B8'] = 0
-            weights['C8'] = 0
-            weights['D8'] = 0
-            weights['A7'] = 0
-            weights['B7'] = 0
-            weights['C7'] = 0
-            weights['D7'] = 0
-            weights['A6'] = 0
-            weights['B6'] = 0
-            weights['C6'] = 0
-            weights['A5'] = 0
-            weights['B5'] = 0
-        if('H8' in board.taken):
-            weights['G8'] = 0
-            weights['F8'] = 0
-            weights['E8'] = 0
-            weights['H7'] = 0
-            weights['G7'] = 0
-            weights['F7'] = 0
-            weights['E7'] = 0
-            weights['H6'] = 0
-            weights['G6'] = 0
-            weights['F6'] = 0
-            weights['H5'] = 0
-            weights['G5'] = 0
-
-        score = 0
-        for xy in board.taken:
-            disc = board.get_disc_value(xy)
-            if disc == player:
-                score += weights[xy]
-        return score
-
-    def _disc_difference(self, board, player):
-        diff = board.score[player] - board.score[player * -1]
-        total = board.score[player] + board.score[player * -1]
-        return 100 * diff / total
-
-    def _corners(self, board, player):
-        corners = ['A1', 'H1', 'A8', 'H8']
-        player = 0
-        op = 0
-        for corner in corners:
-            disc = board.get_disc_value(corner)
-            if disc == player:
-                player += 1
-            if disc == player * -1:
-                op += 1
-        return 100 * (player - op)/(player + op + 1)
-
-    def _last_disc(self, board, player):
-        remaining_discs = 64 - board.score[player] - board.score[player * -1]
-        if (remaining_discs % 2):
-            return -1
-        else:
-            return 1
-
-    def _mobility(self, board, player):
-        own_moves = sum([len(x) for x in board.moves[player].values()])
-        op_moves = sum([len(x) for x in board.moves[player*-1].values()])
-        return 100 * (own_moves - op_moves) / (own_moves + op_moves + 1)
-
-    def _corner_bonus(self, board, player):
-        def _stable_discs(player):
-            directions = {'A1': [1, 'H', 1, '8'], 'H1': [-1, 'A', 1, '8'],
-                          'A8': [1, 'H', -1, '1'], 'H8': [-1, 'A', -1, '1']}
-            stables = 0
-            for key, value in directions.items():
-                dx, xstop, dy, ystop = value
-                for x in range(ord(key[0]), ord(xstop)+dx, dx):
-                    xy = chr(x)+key[1]
-                    if board.get_disc_value(xy) == player:
-                        for y in range(ord(key[1])+dy, ord(ystop)+dy, dy):
-                            xy = chr(x)+chr(y)
-                            if board.get_disc_value(xy) == player:
-                                stables += 1
-                            else:
-                                break
-                    else:
+        if self.table is not None:
+            if best_score <= alpha_orig:
+                bound = UPPER
+            elif best_score >= beta_orig:
+                bound = LOWER
+            else:
+                bound = EXACT
+            self.table.store(board.hash, depth, best_score, bound,
+                             best_move)
+        return best_score, best_move
+
+    def _pvs(self, board, depth, alpha, beta, color, first=None):
+        # Negamax: the value is seen from color, the side to move, and
+        # stored in the table from self.player's side like _minimax does.
+        self.nodes += 1
+        if self.nodes % self.check_interval == 0 and self._out_of_time():
+            raise _SearchTimeout()
+        player = self.player
+        sign = 1 if color == player else -1
+        if depth == 0 or board.current_player == 0:
+            return sign * self._static_evaluation(board, player), None
+
+        hash_move = first
+        if self.table is not None:
+            entry = self.table.probe(board.hash)
+            if entry is not None:
+                entry_depth, value, bound, move = entry
+                if move >= 0:
+                    hash_move = move
+                    value *= sign
+                    if sign < 0 and bound != EXACT:
+                        bound = LOWER if bound == UPPER else UPPER
+                    if (entry_depth == depth or entry_depth > depth and
+                            self.reuse_deeper) and (
+                            bound == EXACT or
+                            bound == LOWER and value >= beta or
+                            bound == UPPER and value <= alpha):
+                        return value, hash_move
+        if (self.probcut is not None and
+                self.probcut.min_depth <= depth < self._root_depth):
+            # The cut test works in self.player's view, as _minimax does.
+            if sign > 0:
+                value = self.probcut.cut(self, board, depth, alpha, beta,
+                                         player)
+            else:
+                value = self.probcut.cut(self, board, depth, -beta, -alpha,
+                                         player)
+            if value is not None:
+                return sign * value, hash_move
+        alpha_orig = alpha
+
+        best_score = -inf
+        for i, move in enumerate(self.ordering.order(
+                self, board, indices(board.move_mask(color)), depth,
+                hash_move, player)):
+            undo = board.play(move)
+            if i == 0:
+                score = self._pvs_child(board, depth, alpha, beta, color)
+            else:
+                score = self._pvs_child(board, depth, alpha,
+                                        nextafter(alpha, inf), color)
+                if alpha < score < beta:
+                    score = self._pvs_child(board, depth, alpha, beta,
+                                            color)
+            board.undo_move(undo)
+            if score > best_score:
+                best_score = score
+                best_move = move
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        self.ordering.cutoff(board, move, i, depth)
                         break
-            return stables
-        own_bonus = _stable_discs(player)
-        op_bonus = _stable_discs(player * -1)
-        return own_bonus - op_bonus
+
+        if self.table is not None:
+            if best_score <= alpha_orig:
+                bound = UPPER if sign > 0 else LOWER
+            elif best_score >= beta:
+                bound = LOWER if sign > 0 else UPPER
+            else:
+                bound = EXACT
+            self.table.store(board.hash, depth, sign * best_score, bound,
+                             best_move)
+        return best_score, best_move
+
+    def _pvs_child(self, board, depth, alpha, beta, color):
+        # The child is searched from its own side to move; a pass keeps
+        # the side, a finished game counts as the opponent's.
+        if board.current_player == color:
+            return self._pvs(board, depth-1, alpha, beta, color)[0]
+        return -self._pvs(board, depth-1, -beta, -alpha, -color)[0]
+
+    def _static_evaluation(self, board, player):
+        self.leaf_evals += 1
+        return self._evaluate(board, player)
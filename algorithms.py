@@ -0,0 +1,61 @@
+from math import inf, nextafter
+
+
+class AlphaBeta(object):
+    # The minimax search with alpha-beta pruning, started with an
+    # aspiration window of ai.aspiration around the previous score.
+
+    def search(self, ai, board, depth, guess, first):
+        if guess is None:
+            alpha, beta = -inf, inf
+        else:
+            alpha, beta = guess - ai.aspiration, guess + ai.aspiration
+        while True:
+            score, move = self.window(ai, board, depth, alpha, beta, first)
+            if score <= alpha and alpha > -inf:
+                alpha = -inf
+            elif score >= beta and beta < inf:
+                beta = inf
+            else:
+                return score, move
+
+    def window(self, ai, board, depth, alpha, beta, first):
+        return ai._minimax(board, depth, alpha, beta, ai.player, first)
+
+
+class PrincipalVariation(AlphaBeta):
+    # Negamax principal variation search: every move after the first is
+    # searched with a null window and only re-searched if it fails high.
+
+    def window(self, ai, board, depth, alpha, beta, first):
+        return ai._pvs(board, depth, alpha, beta, ai.player, first)
+
+
+class MTDF(object):
+    # MTD(f): null-window alpha-beta searches converging on the value from
+    # the previous score, relying on the transposition table to make the
+    # repeated searches cheap.
+
+    def search(self, ai, board, depth, guess, first):
+        if guess is None:
+            guess = ai._static_evaluation(board, ai.player)
+        lower, upper = -inf, inf
+        score, move = guess, first
+        while lower < upper:
+            beta = score if score > lower else nextafter(lower, inf)
+            score, found = ai._minimax(board, depth, nextafter(beta, -inf),
+                                       beta, ai.player, move)
+            if score < beta:
+                upper = score
+            else:
+                # Only a fail high proves the move reaches the bound; a
+                # ProbCut cut at the root proves it without a move.
+                lower = score
+                if found is not None:
+                    move = found
+        return score, move
+
+
+ALGORITHMS = {'alphabeta': AlphaBeta,
+              'pvs': PrincipalVariation,
+              'mtdf': MTDF}
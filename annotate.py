@@ -0,0 +1,222 @@
+"""Whole-game annotation: every position of every game scored with all its
+moves, and the played moves that lost value flagged as errors.
+
+Each game is analysed backwards, from its last position to its first, by
+one engine for both colours. A position's search tree contains the next
+position's, so the transposition table filled there answers part of the
+search here: its moves order the search, and values of the same depth
+are reused. Positions the endgame solver can take, or that the search
+follows to the end, are scored exactly in discs; the others with
+Ai.multi_pv in evaluation units divided by 100, as in server.py. Each
+position records its unit, and errors are flagged with a threshold per
+unit, compared with the loss in that same unit. Games are spread over a
+process pool, a few at a time, and written as one JSON line each as they
+finish, followed by a summary line with the throughput:
+
+    python annotate.py games.bin --depth 4 --workers 8 --output notes.jsonl
+    python annotate.py games.jsonl --time 0.5
+
+Games are read like patterns.read_games: records.py game files,
+selfplay.py JSONL, or one game of squares per line.
+"""
+import argparse
+import itertools
+import json
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from time import perf_counter
+
+from ai import Ai
+from othelloboard import OthelloBoard, SQUARES, indices
+from patterns import read_games
+
+# Engines of this process by their options, kept from game to game.
+_ais = {}
+
+
+def _engine(options):
+    # Scores are from black's view for both colours, so that one table
+    # serves neighbouring positions. Values of deeper searches are not
+    # reused: they would score the played move, whose position was just
+    # analysed, deeper than its alternatives.
+    key = tuple(sorted(options.items()))
+    if key not in _ais:
+        _ais[key] = Ai(None, 1, 0, **options)
+        _ais[key].reuse_deeper = False
+    return _ais[key]
+
+
+def _solve_moves(solver, board):
+    # Exact final disc difference after each move, for the side to move,
+    # and the solver nodes it took.
+    player = board.current_player
+    scores = {}
+    nodes = 0
+    for move in indices(board.move_mask(player)):
+        undo = board.play(move)
+        if board.current_player == 0:
+            score = board.score[player] - board.score[-player]
+        elif board.current_player == player:
+            score = solver.solve(board, player)[0]
+        else:
+            score = -solver.solve(board, -player)[0]
+        nodes += solver.nodes
+        board.undo_move(undo)
+        scores[SQUARES[move]] = score
+    return scores, nodes
+
+
+def annotate_position(ai, board, depth=4, time_limit=0):
+    # Scores of every move of board from the side to move's view, their
+    # unit ('discs' if exact, else 'eval'), the depth searched and the
+    # nodes it took.
+    ai.board = board
+    ai.time_limit = time_limit
+    empties = 64 - board.score[1] - board.score[-1]
+    if empties <= ai.endgame_empties:
+        scores, nodes = _solve_moves(ai.solver, board)
+        return scores, 'discs', empties, nodes
+    lines = ai.multi_pv(None, None if time_limit else depth)
+    sign = 1 if board.current_player == ai.player else -1
+    searched = lines[0]['depth'] if lines else 0
+    if searched >= empties:
+        # Every leaf was a finished game, scored 100000 per disc.
+        scores = {line['move']: round(sign * line['score'] / 100000)
+                  for line in lines}
+        return scores, 'discs', searched, ai.stats.nodes
+    scores = {line['move']: round(sign * line['score'] / 100, 2)
+              for line in lines}
+    return scores, 'eval', searched, ai.stats.nodes
+
+
+def annotate_game(moves, depth=4, time_limit=0, error=2.0, eval_error=5.0,
+                  backwards=True, options=None):
+    # The annotation of one game given as a list of squares. Every
+    # position gets the scores of all its moves; the played move's loss is
+    # the best score minus its own, and losses of at least error discs, or
+    # eval_error in evaluation units divided by 100, are listed as errors. backwards=False
+    # analyses from the first position on, for comparison.
+    options = options or {}
+    moves = [move.upper() for move in moves]
+    start = perf_counter()
+    boards = []
+    board = OthelloBoard()
+    for move in moves:
+        if board.current_player == 0:
+            raise ValueError('move %s after the end of the game' % move)
+        boards.append(board)
+        board = board.copy()
+        board.apply_move(move)
+    order = range(len(boards))
+    positions = [None] * len(boards)
+    nodes = 0
+    for ply in (reversed(order) if backwards else order):
+        board = boards[ply]
+        player = board.current_player
+        move = moves[ply]
+        position = {'ply': ply,
+                    'player': 'black' if player == 1 else 'white',
+                    'move': move}
+        if board.move_mask(player).bit_count() == 1:
+            position['forced'] = True
+        else:
+            scores, unit, searched, searched_nodes = annotate_position(
+                _engine(options), board.copy(), depth, time_limit)
+            nodes += searched_nodes
+            best = max(scores, key=scores.get)
+            position.update(best=best, score=scores[move],
+                            best_score=scores[best],
+                            loss=round(scores[best] - scores[move], 2),
+                            unit=unit,
+                            depth=searched, scores=scores)
+        positions[ply] = position
+    thresholds = {'discs': error, 'eval': eval_error}
+    errors = [position['ply'] for position in positions if 'loss' in position
+              and position['loss'] >= thresholds[position['unit']]]
+    return {'moves': moves,
+            'black': board.score[1], 'white': board.score[-1],
+            'positions': positions, 'errors': errors, 'nodes': nodes,
+            'seconds': perf_counter() - start}
+
+
+def _annotate(game, moves, depth, time_limit, error, eval_error, options):
+    try:
+        result = annotate_game(moves, depth, time_limit, error, eval_error,
+                               options=options)
+    except (KeyError, ValueError) as problem:
+        result = {'moves': moves, 'error': repr(problem)}
+    result['game'] = game
+    return result
+
+
+def run(games, depth=4, time_limit=0, error=2.0, eval_error=5.0, workers=1,
+        options=None):
+    # Yields game annotations as they finish and a summary as the last
+    # item. Only twice as many games as workers are read ahead, so memory
+    # stays bounded however long the stream of games is.
+    summary = {'games': 0, 'positions': 0, 'errors': 0, 'failed': 0}
+    start = perf_counter()
+    games = enumerate(games)
+    ahead = 2 * (workers or os.cpu_count() or 1)
+    with ProcessPoolExecutor(workers) as pool:
+        pending = set()
+        while True:
+            for game, moves in itertools.islice(games, ahead - len(pending)):
+                pending.add(pool.submit(_annotate, game, moves, depth,
+                                        time_limit, error, eval_error,
+                                        options or {}))
+            if not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                result = future.result()
+                summary['games'] += 1
+                if 'error' in result:
+                    summary['failed'] += 1
+                else:
+                    summary['positions'] += len(result['positions'])
+                    summary['errors'] += len(result['errors'])
+                yield result
+    elapsed = perf_counter() - start
+    summary['seconds'] = elapsed
+    summary['games_per_hour'] = 3600 * summary['games'] / elapsed
+    summary['positions_per_sec'] = summary['positions'] / elapsed
+    yield {'summary': summary}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Annotate every position of finished games.')
+    parser.add_argument('games', nargs='+',
+                        help='game files: records.py, selfplay.py JSONL or '
+                        'squares per line')
+    parser.add_argument('--depth', type=int, default=4,
+                        help='search depth when no time limit is given')
+    parser.add_argument('--time', type=float, default=0,
+                        help='seconds per position')
+    parser.add_argument('--error', type=float, default=2.0,
+                        help='loss in discs from which an exactly scored '
+                        'move is listed as an error')
+    parser.add_argument('--eval-error', type=float, default=5.0,
+                        help='the same for searched moves, in evaluation '
+                        'units divided by 100 like their scores')
+    parser.add_argument('--endgame-empties', type=int, default=12,
+                        help='empties from which positions are solved')
+    parser.add_argument('--table-mb', type=float, default=16)
+    parser.add_argument('--workers', type=int, default=None,
+                        help='worker processes (default: all cores)')
+    parser.add_argument('--output', type=argparse.FileType('w'),
+                        default=sys.stdout, help='JSONL output file')
+    args = parser.parse_args(argv)
+    games = (moves for path in args.games for moves in read_games(path))
+    options = {'endgame_empties': args.endgame_empties,
+               'table_mb': args.table_mb}
+    for result in run(games, args.depth, args.time, args.error,
+                      args.eval_error, args.workers, options):
+        args.output.write(json.dumps(result) + '\n')
+        args.output.flush()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,172 @@
+"""Vectorised evaluation of many positions at once with NumPy.
+
+evaluate_batch computes exactly what evaluation.evaluate returns, for a
+whole array of positions per call. Positions are either an (N, 2) array of
+black and white bitboards or an (N, 64) array of squares holding 1 (black),
+-1 (white) or 0. NumPy is only needed by this module. As in
+evaluation.evaluate, the corner term is left out because it is always 0.
+"""
+import numpy as np
+
+from othelloboard import DIRECTIONS
+from evaluation import _WEIGHT_ROWS, _RUN_FROM_A, _RUN_FROM_H
+
+_U64 = np.uint64
+_BITS = np.left_shift(_U64(1), np.arange(64, dtype=_U64))
+_WEIGHTS = np.array(_WEIGHT_ROWS, dtype=np.int64)
+_RUNS = np.array([_RUN_FROM_A, _RUN_FROM_H], dtype=_U64)
+_DIRECTIONS = tuple((_U64(shift), _U64(mask)) for shift, mask in DIRECTIONS)
+_BYTE = _U64(0xFF)
+
+if hasattr(np, 'bitwise_count'):
+    def popcount(x):
+        return np.bitwise_count(x).astype(np.int64)
+else:
+    _BYTE_COUNTS = np.array([bin(i).count('1') for i in range(256)],
+                            dtype=np.int64)
+
+    def popcount(x):
+        x = np.ascontiguousarray(x, dtype=_U64)
+        return _BYTE_COUNTS[x.view(np.uint8)].reshape(
+            x.shape + (8,)).sum(axis=-1)
+
+
+def pack(boards):
+    # (N, 2) bitboards of OthelloBoard instances.
+    return np.array([(board.discs[1], board.discs[-1]) for board in boards],
+                    dtype=_U64).reshape(-1, 2)
+
+
+def bitboards(positions):
+    if not isinstance(positions, np.ndarray):
+        # NumPy turns Python ints from 2**63 on (H8 occupied) into float64,
+        # which loses the low bits; as objects they convert exactly.
+        positions = np.array(positions, dtype=object)
+    if positions.ndim != 2 or positions.shape[1] not in (2, 64):
+        raise ValueError('positions must have shape (N, 2) or (N, 64), not %r'
+                         % (positions.shape,))
+    if positions.shape[1] == 2:
+        positions = positions.astype(_U64)
+        return positions[:, 0], positions[:, 1]
+    positions = positions.astype(np.int8)
+    return (np.bitwise_or.reduce(np.where(positions == 1, _BITS, _U64(0)),
+                                 axis=1),
+            np.bitwise_or.reduce(np.where(positions == -1, _BITS, _U64(0)),
+                                 axis=1))
+
+
+def _fill(o, start, shift, left):
+    # Runs of o continuing start one step at a time; a run is at most six
+    # discs long on an 8x8 board.
+    if left:
+        t = o & (start << shift)
+        for _ in range(5):
+            t |= o & (t << shift)
+    else:
+        t = o & (start >> shift)
+        for _ in range(5):
+            t |= o & (t >> shift)
+    return t
+
+
+def move_mask(own, opp):
+    empty = ~(own | opp)
+    moves = np.zeros_like(own)
+    for shift, mask in _DIRECTIONS:
+        o = opp & mask
+        moves |= _fill(o, own, shift, True) << shift
+        moves |= _fill(o, own, shift, False) >> shift
+    return moves & empty
+
+
+def flip_count(own, opp):
+    # See evaluation.flip_count.
+    empty = ~(own | opp)
+    count = np.zeros(own.shape, dtype=np.int64)
+    for shift, mask in _DIRECTIONS:
+        o = opp & mask
+        count += popcount(_fill(o, own, shift, False) &
+                          _fill(o, empty, shift, True))
+        count += popcount(_fill(o, own, shift, True) &
+                          _fill(o, empty, shift, False))
+    return count
+
+
+def mobility(own, opp):
+    own_moves = flip_count(own, opp)
+    op_moves = flip_count(opp, own)
+    return 100 * (own_moves - op_moves) / (own_moves + op_moves + 1)
+
+
+def corner_state(occupied):
+    return ((occupied & _U64(1)) | (occupied >> _U64(6) & _U64(2)) |
+            (occupied >> _U64(54) & _U64(4)) |
+            (occupied >> _U64(60) & _U64(8))).astype(np.intp)
+
+
+def position_weights(own, occupied):
+    state = corner_state(occupied)
+    total = np.zeros(own.shape, dtype=np.int64)
+    for row in range(8):
+        byte = (own >> _U64(8 * row) & _BYTE).astype(np.intp)
+        total += _WEIGHTS[state, row, byte]
+    return total
+
+
+def stable_discs(own):
+    # See evaluation.stable_discs; a stack is at most seven discs high.
+    stables = np.zeros(own.shape, dtype=np.int64)
+    bottom = (own & _BYTE).astype(np.intp)
+    top = (own >> _U64(56)).astype(np.intp)
+    for runs in _RUNS:
+        run = runs[bottom]
+        for _ in range(7):
+            run = run << _U64(8) & own
+            stables += popcount(run)
+        run = runs[top] << _U64(56)
+        for _ in range(7):
+            run = run >> _U64(8) & own
+            stables += popcount(run)
+    return stables
+
+
+def corner_bonus(own, opp):
+    return stable_discs(own) - stable_discs(opp)
+
+
+def disc_difference(own_count, opp_count):
+    return 100 * (own_count - opp_count) / (own_count + opp_count)
+
+
+def last_disc(own_count, opp_count):
+    return np.where((64 - own_count - opp_count) % 2, -1, 1)
+
+
+def evaluate_batch(positions, player=1):
+    # Scores of positions for player (1, -1 or an array of those). A
+    # position where neither side can move is scored as a finished game,
+    # like a board whose current_player is 0. The result is a float64
+    # array equal element for element to evaluation.evaluate.
+    black, white = bitboards(positions)
+    player = np.broadcast_to(np.asarray(player), black.shape)
+    own = np.where(player == 1, black, white)
+    opp = np.where(player == 1, white, black)
+    own_count = popcount(own)
+    opp_count = popcount(opp)
+    discs = own_count + opp_count
+    over = (move_mask(own, opp) | move_mask(opp, own)) == 0
+
+    # Each phase adds its terms in the order evaluation.evaluate does, so
+    # the floating point sums round identically.
+    mobile = mobility(own, opp)
+    weights = position_weights(own, own | opp)
+    bonus = 10000 * corner_bonus(own, opp)
+    difference = disc_difference(own_count, opp_count)
+    parity = last_disc(own_count, opp_count)
+    opening = 0 + 5 * mobile + 20 * weights + bonus
+    midgame = (0 + 10 * difference + 2 * mobile + 10 * weights +
+               100 * parity + bonus)
+    endgame = 0 + 500 * difference + 500 * parity + bonus
+    score = np.where(discs < 19, opening,
+                     np.where(discs < 57, midgame, endgame))
+    return np.where(over, 100000.0 * (own_count - opp_count), score)
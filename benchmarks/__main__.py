@@ -0,0 +1,132 @@
+"""Run the benchmark suite and write the results as one JSON document.
+
+    python -m benchmarks [--quick] [--only perft,search] [--output FILE]
+    python -m benchmarks --compare OLD.json NEW.json
+
+The document records the git revision, Python version and machine next
+to every benchmark result, so runs can be stored and compared over time.
+--compare prints the ratio new/old of every rate and timing.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+
+from benchmarks import (algorithms, annotate, batch, board, book, endgame,
+                        evaluation, latency, multipv, ordering, parallel,
+                        patterns, perft, probcut, search, server)
+
+# Parameters of the full and the quick run of each benchmark.
+BENCHMARKS = {
+    'perft': (perft.run, {'depth': 8}, {'depth': 6}),
+    'board': (board.run, {'games': 200}, {'games': 20}),
+    'evaluation': (evaluation.run, {'games': 100}, {'games': 10}),
+    'search': (search.run, {'depth': 5}, {'depth': 3, 'compare': False}),
+    'algorithms': (algorithms.run, {'depth': 5}, {'depth': 3}),
+    'ordering': (ordering.run, {'depth': 5}, {'depth': 3}),
+    'endgame': (endgame.run, {'max_empties': 12, 'per_count': 5},
+                {'max_empties': 8, 'per_count': 2}),
+    'latency': (latency.run, {'time_limit': 1.0, 'per_phase': 5},
+                {'time_limit': 0.2, 'per_phase': 1}),
+    'book': (book.run, {'plies': 6}, {'plies': 4}),
+    'parallel': (parallel.run, {'depth': 5}, {'depth': 3}),
+    'batch': (batch.run, {'games': 100}, {'games': 10}),
+    'patterns': (patterns.run, {'games': 20}, {'games': 2, 'depth': 1}),
+    'multipv': (multipv.run, {'depth': 5}, {'depth': 3}),
+    'probcut': (probcut.run, {'time_limit': 1.0, 'games': 8},
+                {'time_limit': 0.2, 'games': 2, 'match_time': 0.05}),
+    'annotate': (annotate.run, {'games': 4, 'depth': 3},
+                 {'games': 1, 'depth': 2}),
+    'server': (server.run, {'clients': 8, 'requests': 10},
+               {'clients': 4, 'requests': 2, 'time_limit': 0.1}),
+}
+DEFAULT = ('perft', 'board', 'evaluation', 'search', 'endgame')
+
+
+def _revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        ).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run(names, quick=False):
+    results = []
+    for name in names:
+        function, full, fast = BENCHMARKS[name]
+        results.append(function(**(fast if quick else full)))
+    return {'meta': {'revision': _revision(),
+                     'time': datetime.now(timezone.utc).isoformat(),
+                     'python': platform.python_version(),
+                     'machine': platform.platform(),
+                     'cpus': os.cpu_count(),
+                     'quick': quick},
+            'results': results}
+
+
+def _metrics(value, path=''):
+    if isinstance(value, dict):
+        for key, item in value.items():
+            yield from _metrics(item, path + '/' + str(key))
+    elif isinstance(value, list):
+        for i, item in enumerate(value):
+            key = item.get('depth', item.get('empties', i)) if isinstance(
+                item, dict) else i
+            yield from _metrics(item, path + '/' + str(key))
+    elif (isinstance(value, (int, float)) and not isinstance(value, bool) and
+          (path.endswith('per_sec') or path.endswith('seconds') or
+           path.endswith('nodes') or path.split('/')[-1] in ('p50', 'p99'))):
+        yield path, value
+
+
+def compare(old, new):
+    old_metrics = {}
+    for result in old['results']:
+        old_metrics.update(_metrics(result, result['benchmark']))
+    rows = []
+    for result in new['results']:
+        for path, value in _metrics(result, result['benchmark']):
+            if path in old_metrics and old_metrics[path]:
+                rows.append((path, old_metrics[path], value,
+                             value / old_metrics[path]))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks',
+                                     description='Run the benchmarks.')
+    parser.add_argument('--only', default=','.join(DEFAULT),
+                        help='comma separated benchmarks, from: ' +
+                        ', '.join(BENCHMARKS))
+    parser.add_argument('--quick', action='store_true',
+                        help='small parameters for a smoke run')
+    parser.add_argument('--output', type=argparse.FileType('w'),
+                        default=sys.stdout)
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'),
+                        help='compare two result files instead of running')
+    args = parser.parse_args(argv)
+    if args.compare:
+        with open(args.compare[0]) as f:
+            old = json.load(f)
+        with open(args.compare[1]) as f:
+            new = json.load(f)
+        for path, before, after, ratio in compare(old, new):
+            args.output.write('%-60s %14.6g %14.6g %8.3f\n'
+                              % (path, before, after, ratio))
+        return
+    names = [name.strip() for name in args.only.split(',') if name.strip()]
+    for name in names:
+        if name not in BENCHMARKS:
+            parser.error('unknown benchmark %r' % name)
+    json.dump(run(names, args.quick), args.output, indent=1)
+    args.output.write('\n')
+
+
+if __name__ == '__main__':
+    main()
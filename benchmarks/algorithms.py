@@ -0,0 +1,54 @@
+"""Equivalence check and comparison of the search algorithms.
+
+Every algorithm must find the same minimax value as alpha-beta at each
+fixed depth on the position suite. Nodes and wall time are reported per
+algorithm for a full iterative deepening run.
+
+Run from the repository root with ``python -m benchmarks.algorithms [depth]``.
+"""
+import json
+import sys
+from time import perf_counter
+
+from ai import Ai
+from algorithms import ALGORITHMS
+from benchmarks.positions import suite
+
+
+def deepening(algorithm, depth, boards):
+    scores = []
+    nodes = 0
+    start = perf_counter()
+    for board in boards:
+        ai = Ai(board, board.current_player, 0, algorithm=algorithm)
+        ai._new_search()
+        score = None
+        values = []
+        for d in range(1, depth + 1):
+            score, _ = ai._root_search(board.copy(), d, score, None)
+            values.append(score)
+        scores.append(values)
+        nodes += ai.nodes
+    return scores, {'algorithm': algorithm, 'nodes': nodes,
+                    'seconds': perf_counter() - start}
+
+
+def run(depth=5):
+    boards = [board for board in suite() if board.current_player != 0]
+    reference, _ = deepening('alphabeta', depth, boards)
+    results = []
+    for algorithm in ALGORITHMS:
+        scores, result = deepening(algorithm, depth, boards)
+        if scores != reference:
+            raise AssertionError('%s disagrees with alpha-beta' % algorithm)
+        results.append(result)
+    return {'benchmark': 'algorithms', 'depth': depth, 'results': results}
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    print(json.dumps(run(int(argv[0]) if argv else 5)))
+
+
+if __name__ == '__main__':
+    main()
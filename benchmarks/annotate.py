@@ -0,0 +1,95 @@
+"""Throughput of whole-game annotation, and its nodes when games are
+analysed backwards on one engine rather than from the first position on.
+
+Games are seeded random playouts. Both orders annotate the same games in
+this process on fresh engines and must give the same scores, as table
+values are only reused at equal depth. A midgame move giving up a corner
+that another move keeps must be flagged as an error. Then the pool
+pipeline reports games per hour.
+
+Run from the repository root with ``python -m benchmarks.annotate [games]``.
+"""
+import json
+import sys
+from time import perf_counter
+
+import annotate
+from othelloboard import OthelloBoard, SQUARES, indices
+from selfplay import random_opening
+
+CORNERS = 1 | 1 << 7 | 1 << 56 | 1 << 63
+
+
+def order(games, depth, backwards, options):
+    annotate._ais.clear()
+    annotate._engine(options)
+    nodes = 0
+    scores = []
+    start = perf_counter()
+    for moves in games:
+        result = annotate.annotate_game(moves, depth, backwards=backwards,
+                                        options=options)
+        nodes += result['nodes']
+        scores.append([position.get('scores')
+                       for position in result['positions']])
+    return scores, {'order': 'backwards' if backwards else 'forwards',
+                    'nodes': nodes, 'seconds': perf_counter() - start}
+
+
+def corner_gift(moves, min_empties):
+    # The first position of a game, with more than min_empties empties,
+    # where neither side can take a corner and one move gives a corner to
+    # the opponent while another does not: the game up to that move, and
+    # its ply.
+    board = OthelloBoard()
+    for ply, move in enumerate(moves):
+        if 64 - board.score[1] - board.score[-1] <= min_empties:
+            break
+        player = board.current_player
+        if not (board.move_mask(player) | board.move_mask(-player)) & CORNERS:
+            gifts = []
+            safe = []
+            for square in indices(board.move_mask(player)):
+                undo = board.play(square)
+                given = (board.current_player == -player and
+                         board.move_mask(-player) & CORNERS)
+                board.undo_move(undo)
+                (gifts if given else safe).append(SQUARES[square])
+            if gifts and safe:
+                return moves[:ply] + [gifts[0]], ply
+        board.apply_move(move)
+    return None
+
+
+def run(games=4, depth=3, endgame_empties=10, workers=None):
+    records = [random_opening(60, seed) for seed in range(games)]
+    options = {'endgame_empties': endgame_empties}
+    forwards, forwards_result = order(records, depth, False, options)
+    backwards, backwards_result = order(records, depth, True, options)
+    if forwards != backwards:
+        raise AssertionError('annotation depends on the order of analysis')
+    results = [forwards_result, backwards_result]
+    for moves in records:
+        gift = corner_gift(moves, endgame_empties)
+        if gift is not None:
+            result = annotate.annotate_game(gift[0], depth, options=options)
+            if gift[1] not in result['errors']:
+                raise AssertionError('giving up a corner with %s is not '
+                                     'flagged' % gift[0][-1])
+    for result in annotate.run(records, depth, workers=workers,
+                               options=options):
+        if 'summary' in result:
+            summary = result['summary']
+    return {'benchmark': 'annotate', 'depth': depth, 'games': games,
+            'results': results,
+            'games_per_hour': summary['games_per_hour'],
+            'positions_per_sec': summary['positions_per_sec']}
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    print(json.dumps(run(int(argv[0]) if argv else 4)))
+
+
+if __name__ == '__main__':
+    main()
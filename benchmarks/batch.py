@@ -0,0 +1,55 @@
+"""Parity check and positions/sec of batch.evaluate_batch against the
+scalar evaluation.evaluate. Needs NumPy.
+
+Run from the repository root with ``python -m benchmarks.batch [games]``.
+"""
+import json
+import sys
+from time import perf_counter
+
+from evaluation import evaluate
+from benchmarks.evaluation import sample
+
+
+def run(games=100, repeat=5):
+    # Imported here so the other benchmarks run without NumPy installed.
+    import numpy as np
+    from batch import evaluate_batch, pack
+
+    boards = sample(games)
+    positions = pack(boards)
+    players = np.array([1, -1] * len(boards))
+    positions = np.repeat(positions, 2, axis=0)
+    expected = [evaluate(board, player)
+                for board in boards for player in (1, -1)]
+    if evaluate_batch(positions, players).tolist() != expected:
+        raise AssertionError('batch evaluation differs from evaluate')
+    # Plain lists of Python ints, as callers without pack() pass them.
+    listed = [[board.discs[1], board.discs[-1]] for board in boards]
+    if evaluate_batch(listed).tolist() != expected[::2]:
+        raise AssertionError('batch evaluation of a list differs from '
+                             'evaluate')
+
+    start = perf_counter()
+    for _ in range(repeat):
+        for board in boards:
+            evaluate(board, 1)
+            evaluate(board, -1)
+    scalar = repeat * len(positions) / (perf_counter() - start)
+    start = perf_counter()
+    for _ in range(repeat):
+        evaluate_batch(positions, players)
+    vectorised = repeat * len(positions) / (perf_counter() - start)
+    return {'benchmark': 'batch', 'positions_checked': len(positions),
+            'positions_per_sec': vectorised,
+            'scalar_positions_per_sec': scalar,
+            'speedup': vectorised / scalar}
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    print(json.dumps(run(int(argv[0]) if argv else 100)))
+
+
+if __name__ == '__main__':
+    main()
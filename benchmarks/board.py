@@ -0,0 +1,137 @@
+"""Differential check and speed comparison of OthelloBoard against the
+original list-of-lists board kept in benchmarks/reference.py, including
+an apply_move/undo_move round trip and the incremental Zobrist hash at
+every ply, followed by the raw rates of move generation, play/undo and
+apply_move.
+
+Run from the repository root with ``python -m benchmarks.board``.
+"""
+import json
+import random
+import sys
+from time import perf_counter
+
+from othelloboard import OthelloBoard, indices, move_mask, zobrist
+from benchmarks.reference import OthelloBoard as ReferenceBoard
+
+
+def _state(board):
+    discs = {xy: board.get_disc_value(xy)
+             for xy in (x + str(y) for x in 'ABCDEFGH' for y in range(1, 9))}
+    moves = {player: {move: sorted(flips)
+                      for move, flips in board.moves[player].items()}
+             for player in (1, -1)}
+    return (discs, moves, dict(board.score), board.current_player,
+            set(board.taken))
+
+
+def differential(games, seed=0):
+    rng = random.Random(seed)
+    positions = 0
+    for game in range(games):
+        board = OthelloBoard()
+        reference = ReferenceBoard()
+        while True:
+            if _state(board) != _state(reference):
+                raise AssertionError('game %d diverged after %d moves'
+                                     % (game, positions))
+            if board.hash != zobrist(board.discs, board.current_player):
+                raise AssertionError('game %d has a stale hash after %d '
+                                     'moves' % (game, positions))
+            positions += 1
+            if board.current_player == 0:
+                break
+            move = rng.choice(sorted(reference.moves[
+                reference.current_player]))
+            before = _state(board)
+            board.undo_move(board.apply_move(move))
+            if _state(board) != before:
+                raise AssertionError('undo of %s failed in game %d'
+                                     % (move, game))
+            board.apply_move(move)
+            reference.apply_move(move)
+    return positions
+
+
+def _random_games(games, seed):
+    rng = random.Random(seed)
+    lines = []
+    for _ in range(games):
+        board = OthelloBoard()
+        line = []
+        while board.current_player != 0:
+            move = rng.choice(sorted(board.moves[board.current_player]))
+            line.append(move)
+            board.apply_move(move)
+        lines.append(line)
+    return lines
+
+
+def replay_rate(board_class, lines):
+    moves = 0
+    start = perf_counter()
+    for line in lines:
+        board = board_class()
+        for move in line:
+            board.apply_move(move)
+            board.moves
+        moves += len(line)
+    return moves / (perf_counter() - start)
+
+
+def operation_rates(lines):
+    # Raw board operations over every position of the replayed games.
+    boards = []
+    for line in lines:
+        board = OthelloBoard()
+        for move in line:
+            boards.append(board.copy())
+            board.apply_move(move)
+    positions = [(board.discs[board.current_player],
+                  board.discs[board.current_player * -1]) for board in boards]
+
+    start = perf_counter()
+    for own, opp in positions:
+        move_mask(own, opp)
+    generation = len(positions) / (perf_counter() - start)
+
+    children = [(board, list(indices(board.move_mask(board.current_player))))
+                for board in boards]
+    plays = 0
+    start = perf_counter()
+    for board, moves in children:
+        for move in moves:
+            board.undo_move(board.play(move))
+        plays += len(moves)
+    play_undo = plays / (perf_counter() - start)
+
+    boards = [OthelloBoard() for _ in lines]
+    start = perf_counter()
+    for board, line in zip(boards, lines):
+        for move in line:
+            board.apply_move(move)
+    apply = len(positions) / (perf_counter() - start)
+    return {'move_generation_per_sec': generation,
+            'play_undo_per_sec': play_undo,
+            'apply_move_per_sec': apply}
+
+
+def run(games=200):
+    positions = differential(games)
+    lines = _random_games(games, seed=1)
+    result = {'benchmark': 'board',
+              'games': games,
+              'positions_checked': positions,
+              'moves_per_sec': replay_rate(OthelloBoard, lines),
+              'reference_moves_per_sec': replay_rate(ReferenceBoard, lines)}
+    result.update(operation_rates(lines))
+    return result
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    print(json.dumps(run(int(argv[0]) if argv else 200)))
+
+
+if __name__ == '__main__':
+    main()
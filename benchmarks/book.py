@@ -0,0 +1,49 @@
+"""Build time, open time and lookup latency of the opening book.
+
+Run from the repository root with ``python -m benchmarks.book [plies]``.
+"""
+import json
+import os
+import sys
+import tempfile
+from time import perf_counter
+
+from book import BookBuilder, OpeningBook
+from benchmarks.positions import random_position
+
+
+def run(plies=5, depth=2, lookups=2000):
+    builder = BookBuilder(plies, depth)
+    start = perf_counter()
+    builder.build()
+    build_seconds = perf_counter() - start
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'book.bin')
+        builder.write(path)
+        start = perf_counter()
+        book = OpeningBook(path)
+        open_seconds = perf_counter() - start
+        boards = [random_position(ply, seed)
+                  for ply in range(plies) for seed in range(10)]
+        hits = 0
+        start = perf_counter()
+        for i in range(lookups):
+            hits += book.probe(boards[i % len(boards)]) is not None
+        lookup_seconds = (perf_counter() - start) / lookups
+        book.close()
+        size = os.path.getsize(path)
+    return {'benchmark': 'book', 'plies': plies, 'positions': len(book),
+            'bytes': size, 'build_seconds': build_seconds,
+            'open_seconds': open_seconds,
+            'lookup_microseconds': lookup_seconds * 1e6,
+            'hit_rate': hits / lookups}
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    plies = int(argv[0]) if argv else 5
+    print(json.dumps(run(plies)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""Time-to-solve and nodes/sec of the endgame solver on a fixed set of
+endgame positions. Positions with few empties are also checked against a
+plain minimax over the whole remaining game tree.
+
+Run from the repository root with
+``python -m benchmarks.endgame [max_empties] [positions_per_count]``.
+"""
+import json
+import sys
+from time import perf_counter
+
+from endgame import EndgameSolver
+from othelloboard import indices
+from benchmarks.positions import random_position
+
+
+def full_minimax(board, player):
+    if board.current_player == 0:
+        return board.score[player] - board.score[player * -1]
+    scores = []
+    for move in list(indices(board.move_mask(board.current_player))):
+        undo = board.play(move)
+        scores.append(full_minimax(board, player))
+        board.undo_move(undo)
+    return max(scores) if board.current_player == player else min(scores)
+
+
+def endgame_positions(empties, count):
+    positions = []
+    seed = 0
+    while len(positions) < count:
+        board = random_position(60 - empties, seed)
+        seed += 1
+        if (board.current_player != 0 and
+                64 - board.score[1] - board.score[-1] == empties):
+            positions.append(board)
+    return positions
+
+
+def run(max_empties=12, per_count=5, checked_empties=8):
+    solver = EndgameSolver()
+    results = []
+    for empties in range(6, max_empties + 1, 2):
+        nodes = 0
+        wld_nodes = 0
+        elapsed = 0
+        for board in endgame_positions(empties, per_count):
+            player = board.current_player
+            start = perf_counter()
+            score, _ = solver.solve(board, player)
+            nodes += solver.nodes
+            solver.solve(board, player, wld=True)
+            wld_nodes += solver.nodes
+            elapsed += perf_counter() - start
+            if (empties <= checked_empties and
+                    score != full_minimax(board, player)):
+                raise AssertionError('wrong solve at %d empties for %r'
+                                     % (empties, board.discs))
+        results.append({'empties': empties, 'positions': per_count,
+                        'exact_nodes': nodes, 'wld_nodes': wld_nodes,
+                        'seconds_per_position': elapsed / per_count,
+                        'nodes_per_sec': (nodes + wld_nodes) / elapsed})
+    return {'benchmark': 'endgame', 'results': results}
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    max_empties = int(argv[0]) if argv else 12
+    per_count = int(argv[1]) if len(argv) > 1 else 5
+    print(json.dumps(run(max_empties, per_count)))
+
+
+if __name__ == '__main__':
+    main()
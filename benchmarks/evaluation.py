@@ -0,0 +1,72 @@
+"""Parity check and leaf evaluations/sec of evaluation.evaluate against
+the original Ai._static_evaluation.
+
+Run from the repository root with ``python -m benchmarks.evaluation``.
+"""
+import json
+import random
+import sys
+from time import perf_counter
+
+from evaluation import evaluate
+from othelloboard import OthelloBoard
+from benchmarks import reference
+
+
+def sample(games, seed=0):
+    # Every position of a batch of random games, so all three phases and
+    # finished games are covered.
+    rng = random.Random(seed)
+    boards = []
+    for _ in range(games):
+        board = OthelloBoard()
+        boards.append(board.copy())
+        while board.current_player != 0:
+            board.apply_move(rng.choice(sorted(board.moves[
+                board.current_player])))
+            boards.append(board.copy())
+    return boards
+
+
+def parity(boards):
+    static_evaluation = reference.Ai(None, 1, 0)._static_evaluation
+    for board in boards:
+        for player in (1, -1):
+            if evaluate(board, player) != static_evaluation(board, player):
+                raise AssertionError('evaluation differs for player %d on %r'
+                                     % (player, board.discs))
+    return 2 * len(boards)
+
+
+def rate(evaluator, boards):
+    start = perf_counter()
+    for board in boards:
+        evaluator(board, 1)
+        evaluator(board, -1)
+    return 2 * len(boards) / (perf_counter() - start)
+
+
+def _reference_evaluator():
+    static_evaluation = reference.Ai(None, 1, 0)._static_evaluation
+
+    def evaluator(board, player):
+        board._moves = None
+        return static_evaluation(board, player)
+    return evaluator
+
+
+def run(games=100):
+    boards = sample(games)
+    return {'benchmark': 'evaluation',
+            'positions_checked': parity(boards),
+            'evals_per_sec': rate(evaluate, boards),
+            'reference_evals_per_sec': rate(_reference_evaluator(), boards)}
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    print(json.dumps(run(int(argv[0]) if argv else 100)))
+
+
+if __name__ == '__main__':
+    main()
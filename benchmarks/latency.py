@@ -0,0 +1,44 @@
+"""Wall-clock latency of Ai.time_limit_move against its time limit.
+
+Run from the repository root with
+``python -m benchmarks.latency [time_limit] [positions_per_phase]``.
+"""
+import json
+import sys
+from time import perf_counter
+
+from ai import Ai
+from benchmarks.positions import suite
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def run(time_limit=1.0, per_phase=5):
+    latencies = []
+    for board in suite(per_phase=per_phase):
+        if board.current_player == 0:
+            continue
+        ai = Ai(board, board.current_player, time_limit)
+        start = perf_counter()
+        ai.time_limit_move()
+        latencies.append(perf_counter() - start)
+    return {'benchmark': 'latency', 'time_limit': time_limit,
+            'searches': len(latencies),
+            'p50': percentile(latencies, 0.5),
+            'p99': percentile(latencies, 0.99),
+            'max': max(latencies),
+            'within_limit': max(latencies) < time_limit}
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    time_limit = float(argv[0]) if argv else 1.0
+    per_phase = int(argv[1]) if len(argv) > 1 else 5
+    print(json.dumps(run(time_limit, per_phase)))
+
+
+if __name__ == '__main__':
+    main()
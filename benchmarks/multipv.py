@@ -0,0 +1,65 @@
+"""Multi-PV analysis against a full-window search of every root move.
+
+For each K, Ai.multi_pv must return the same top-K scores as searching
+every child of the root with a full window, and nodes and wall time of
+both are reported. The naive search runs at the final depth only, with
+the same transposition table; multi_pv deepens iteratively.
+
+Run from the repository root with ``python -m benchmarks.multipv [depth]``.
+"""
+import json
+import sys
+from math import inf
+from time import perf_counter
+
+from ai import Ai
+from benchmarks.positions import suite
+from othelloboard import indices
+
+
+def naive(board, depth):
+    # Full-window scores of every move at depth, best first.
+    ai = Ai(board, board.current_player, 0)
+    ai._new_search()
+    scores = []
+    for move in indices(board.move_mask(board.current_player)):
+        child = board.copy()
+        child.play(move)
+        scores.append(ai._minimax(child, depth - 1, -inf, inf,
+                                  ai.player)[0])
+    return sorted(scores, reverse=True), ai.nodes
+
+
+def run(depth=4, ks=(1, 3, None)):
+    boards = [board for board in suite() if board.current_player != 0]
+    start = perf_counter()
+    reference = []
+    naive_nodes = 0
+    for board in boards:
+        scores, nodes = naive(board, depth)
+        reference.append(scores)
+        naive_nodes += nodes
+    results = [{'method': 'naive', 'nodes': naive_nodes,
+                'seconds': perf_counter() - start}]
+    for k in ks:
+        start = perf_counter()
+        nodes = 0
+        for board, scores in zip(boards, reference):
+            ai = Ai(board, board.current_player, 0)
+            lines = ai.multi_pv(k, depth)
+            nodes += ai.nodes
+            if [line['score'] for line in lines] != scores[:k]:
+                raise AssertionError('multi_pv(%r) disagrees with the full '
+                                     'window search' % k)
+        results.append({'method': 'multi_pv', 'k': k or 'all',
+                        'nodes': nodes, 'seconds': perf_counter() - start})
+    return {'benchmark': 'multipv', 'depth': depth, 'results': results}
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    print(json.dumps(run(int(argv[0]) if argv else 4)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+"""Node counts and first-move cutoff rate of each move ordering strategy
+for iterative deepening to a fixed depth on the position suite.
+
+Run from the repository root with ``python -m benchmarks.ordering [depth]``.
+"""
+import json
+import sys
+from math import inf
+from time import perf_counter
+
+from ai import Ai
+from ordering import ORDERINGS
+from benchmarks.positions import suite
+
+
+def deepening(ordering, depth):
+    nodes = cutoffs = first_move_cutoffs = 0
+    start = perf_counter()
+    for board in suite():
+        ai = Ai(board, board.current_player, 0, ordering=ordering)
+        ai._new_search()
+        for d in range(1, depth + 1):
+            ai._minimax(board, d, -inf, inf, ai.player)
+        nodes += ai.nodes
+        cutoffs += ai.ordering.cutoffs
+        first_move_cutoffs += ai.ordering.first_move_cutoffs
+    return {'ordering': ordering, 'nodes': nodes,
+            'seconds': perf_counter() - start,
+            'first_move_cutoff_rate': first_move_cutoffs / max(1, cutoffs)}
+
+
+def run(depth=5):
+    results = [deepening(ordering, depth) for ordering in ORDERINGS]
+    for result in results:
+        result['node_reduction'] = 1 - result['nodes'] / results[0]['nodes']
+    return {'benchmark': 'ordering', 'depth': depth, 'results': results}
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    print(json.dumps(run(int(argv[0]) if argv else 5)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""Speedup of the parallel root-split search over the serial search at a
+fixed depth, and a check that both choose the same move.
+
+Run from the repository root with
+``python -m benchmarks.parallel [depth] [workers ...]``.
+"""
+import json
+import os
+import sys
+from time import perf_counter
+
+from ai import Ai
+from benchmarks.positions import suite
+
+
+def _timed(depth, workers):
+    moves = []
+    nodes = 0
+    ai = Ai(None, 1, 0, workers=workers)
+    start = perf_counter()
+    for board in suite():
+        if board.current_player == 0:
+            moves.append(None)
+            continue
+        ai.board = board
+        ai.player = board.current_player
+        # Fresh table and ordering state, so the root move order and thus
+        # the choice among equally scored moves only depends on the board.
+        if ai.table is not None:
+            ai.table.clear()
+        ai.ordering = type(ai.ordering)()
+        ai._new_search()
+        moves.append(ai._root_search(board.copy(), depth, None, None)[1])
+        nodes += ai.nodes
+    elapsed = perf_counter() - start
+    ai.close()
+    return moves, {'workers': workers, 'nodes': nodes, 'seconds': elapsed}
+
+
+def run(depth=5, counts=None):
+    counts = counts or sorted({2, 4, os.cpu_count() or 1})
+    serial_moves, serial = _timed(depth, 1)
+    runs = [serial]
+    for workers in counts:
+        moves, result = _timed(depth, workers)
+        result['speedup'] = serial['seconds'] / result['seconds']
+        result['same_moves'] = moves == serial_moves
+        runs.append(result)
+    return {'benchmark': 'parallel', 'depth': depth,
+            'cpus': os.cpu_count(), 'runs': runs}
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    depth = int(argv[0]) if argv else 5
+    print(json.dumps(run(depth, [int(arg) for arg in argv[1:]])))
+
+
+if __name__ == '__main__':
+    main()
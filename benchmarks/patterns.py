@@ -0,0 +1,40 @@
+"""Evals/sec and match results of the pattern evaluator against the
+standard one. Needs fitted tables (see patterns.py); they are read from
+OTHELLO_PATTERNS or patterns.bin.
+
+Run from the repository root with ``python -m benchmarks.patterns [games]``.
+"""
+import json
+import sys
+
+import patterns
+import selfplay
+from evaluation import evaluate
+from benchmarks.evaluation import rate, sample
+
+
+def run(games=20, depth=2, workers=None):
+    boards = sample(games)
+    result = {'benchmark': 'patterns',
+              'evals_per_sec': rate(patterns.evaluate, boards),
+              'standard_evals_per_sec': rate(evaluate, boards)}
+    # Games of the pattern evaluator (A) against the standard one (B),
+    # each opening played with both colours.
+    for game in selfplay.run({'depth': depth, 'eval': 'pattern'},
+                             {'depth': depth}, games, workers,
+                             opening_plies=6):
+        if 'summary' in game:
+            summary = game['summary']
+    result['match'] = {key: summary[key] for key in
+                       ('games', 'win', 'draw', 'loss', 'margin')}
+    result['match']['depth'] = depth
+    return result
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    print(json.dumps(run(int(argv[0]) if argv else 20)))
+
+
+if __name__ == '__main__':
+    main()
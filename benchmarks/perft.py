@@ -0,0 +1,57 @@
+"""Perft: the number of leaves of the game tree to a given depth from the
+start position, checked against the published values. A pass counts as
+a ply, and a finished game counts as a leaf.
+
+Run from the repository root with ``python -m benchmarks.perft [depth]``.
+"""
+import json
+import sys
+from time import perf_counter
+
+from othelloboard import OthelloBoard, indices
+
+KNOWN = {1: 4, 2: 12, 3: 56, 4: 244, 5: 1396, 6: 8200, 7: 55092,
+         8: 390216, 9: 3005288, 10: 24571284}
+
+
+def perft(board, depth):
+    player = board.current_player
+    if depth == 0 or player == 0:
+        return 1
+    moves = board.move_mask(player)
+    if depth == 1:
+        return moves.bit_count()
+    leaves = 0
+    for move in list(indices(moves)):
+        undo = board.play(move)
+        if board.current_player == player:
+            # The opponent has to pass, which uses up a ply of its own.
+            leaves += 1 if depth == 2 else perft(board, depth - 2)
+        else:
+            leaves += perft(board, depth - 1)
+        board.undo_move(undo)
+    return leaves
+
+
+def run(depth=7):
+    results = []
+    board = OthelloBoard()
+    for d in range(1, depth + 1):
+        start = perf_counter()
+        leaves = perft(board, d)
+        elapsed = perf_counter() - start
+        if d in KNOWN and leaves != KNOWN[d]:
+            raise AssertionError('perft(%d) is %d, expected %d'
+                                 % (d, leaves, KNOWN[d]))
+        results.append({'depth': d, 'leaves': leaves, 'seconds': elapsed,
+                        'leaves_per_sec': leaves / elapsed})
+    return {'benchmark': 'perft', 'results': results}
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    print(json.dumps(run(int(argv[0]) if argv else 7)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,24 @@
+"""Fixed position suite shared by the benchmarks.
+
+Positions are reached by seeded random playouts, so every run and every
+benchmark searches exactly the same boards.
+"""
+import random
+
+from othelloboard import OthelloBoard
+
+
+def random_position(plies, seed, board_class=OthelloBoard):
+    rng = random.Random(seed)
+    board = board_class()
+    for _ in range(plies):
+        if board.current_player == 0:
+            break
+        board.apply_move(rng.choice(sorted(board.moves[
+            board.current_player])))
+    return board
+
+
+def suite(board_class=OthelloBoard, plies=(8, 20, 32, 44), per_phase=3):
+    return [random_position(ply, seed, board_class)
+            for ply in plies for seed in range(per_phase)]
@@ -0,0 +1,72 @@
+"""Depth reached and match results of ProbCut selective search against the
+plain search at the same time limit. Needs calibrated parameters (see
+probcut.py); they are read from OTHELLO_PROBCUT or probcut.json.
+
+For each selectivity the midgame positions of the suite are searched with
+Ai.time_limit_move, reporting the mean depth reached, nodes per second,
+cuts and how often the move equals the plain search's. A match of
+selective against plain search at match_time per move follows.
+
+Run from the repository root with
+``python -m benchmarks.probcut [time_limit] [games]``.
+"""
+import json
+import sys
+
+import selfplay
+from ai import Ai
+from benchmarks.positions import suite
+
+
+def timed(boards, time_limit, selectivity):
+    depths = []
+    moves = []
+    nodes = seconds = cuts = 0
+    for board in boards:
+        ai = Ai(board, board.current_player, time_limit,
+                selectivity=selectivity)
+        moves.append(ai.time_limit_move())
+        depths.append(ai.stats.depth)
+        nodes += ai.stats.nodes
+        seconds += ai.stats.seconds
+        cuts += ai.stats.probcuts
+    return moves, {'selectivity': selectivity,
+                   'mean_depth': sum(depths) / len(depths),
+                   'max_depth': max(depths),
+                   'nodes_per_sec': nodes / seconds, 'probcuts': cuts}
+
+
+def run(time_limit=1.0, games=8, selectivities=(1.0, 1.5, 2.0),
+        match_time=0.1, match_selectivity=1.5, workers=None):
+    boards = [board for board in suite(plies=(8, 20, 32))
+              if board.current_player != 0]
+    plain_moves, plain = timed(boards, time_limit, None)
+    results = [plain]
+    for selectivity in selectivities:
+        moves, result = timed(boards, time_limit, selectivity)
+        result['same_move'] = sum(
+            a == b for a, b in zip(moves, plain_moves)) / len(moves)
+        results.append(result)
+    # Games of the selective search (A) against the plain one (B), each
+    # opening played with both colours.
+    for game in selfplay.run(
+            {'time': match_time, 'selectivity': match_selectivity},
+            {'time': match_time}, games, workers, opening_plies=6):
+        if 'summary' in game:
+            summary = game['summary']
+    match = {key: summary[key] for key in
+             ('games', 'win', 'draw', 'loss', 'margin')}
+    match.update(time_limit=match_time, selectivity=match_selectivity)
+    return {'benchmark': 'probcut', 'time_limit': time_limit,
+            'results': results, 'match': match}
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    time_limit = float(argv[0]) if argv else 1.0
+    games = int(argv[1]) if len(argv) > 1 else 8
+    print(json.dumps(run(time_limit, games)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""Node counts and nodes/sec of Ai._minimax at a fixed depth, compared
+against the deepcopy-per-node search on the same board and against the
+original implementation, plus iterative deepening to that depth with and
+without the transposition table and the time to reach each depth.
+
+Run from the repository root with ``python -m benchmarks.search [depth]``.
+"""
+import json
+import sys
+from math import inf
+from time import perf_counter
+
+from ai import Ai
+from benchmarks import reference
+from benchmarks.positions import suite
+
+
+class _CountingReferenceAi(reference.Ai):
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.nodes = 0
+
+    def _minimax(self, *args):
+        self.nodes += 1
+        return super()._minimax(*args)
+
+
+def fixed_depth(ai_class, depth, board_class=None):
+    kwargs = {} if board_class is None else {'board_class': board_class}
+    nodes = 0
+    elapsed = 0
+    for board in suite(**kwargs):
+        # Only the search is timed, not building the Ai and its table.
+        ai = ai_class(board, board.current_player, 0)
+        ai.nodes = 0
+        start = perf_counter()
+        ai._minimax(board, depth, -inf, inf, ai.player)
+        elapsed += perf_counter() - start
+        nodes += ai.nodes
+    return {'nodes': nodes, 'seconds': elapsed, 'nodes_per_sec': nodes / elapsed}
+
+
+def deepening(depth, table_mb):
+    nodes = 0
+    elapsed = 0
+    tables = []
+    for board in suite():
+        # Building the table and scanning it for stats() are left out of
+        # the timing, which is of the search alone.
+        ai = Ai(board, board.current_player, 0, table_mb=table_mb)
+        ai._new_search()
+        start = perf_counter()
+        for d in range(1, depth + 1):
+            ai._minimax(board, d, -inf, inf, ai.player)
+        elapsed += perf_counter() - start
+        nodes += ai.nodes
+        if ai.table is not None:
+            tables.append(ai.table.stats())
+    result = {'nodes': nodes, 'seconds': elapsed,
+              'nodes_per_sec': nodes / elapsed}
+    for counter in ('hits', 'misses', 'occupied_misses'):
+        result[counter] = sum(stats[counter] for stats in tables)
+    return result
+
+
+def time_to_depth(depth):
+    # Seconds and nodes of iterative deepening over the suite until each
+    # depth is completed.
+    ais = [Ai(board, board.current_player, 0) for board in suite()]
+    for ai in ais:
+        ai._new_search()
+    seconds = 0
+    results = []
+    for d in range(1, depth + 1):
+        start = perf_counter()
+        for ai in ais:
+            ai._minimax(ai.board, d, -inf, inf, ai.player)
+        seconds += perf_counter() - start
+        results.append({'depth': d, 'seconds': seconds,
+                        'nodes': sum(ai.nodes for ai in ais)})
+    return results
+
+
+def run(depth=4, compare=True):
+    result = {'benchmark': 'search', 'depth': depth,
+              'ai': fixed_depth(Ai, depth),
+              'deepening': deepening(depth, table_mb=16),
+              'deepening_no_table': deepening(depth, table_mb=0),
+              'time_to_depth': time_to_depth(depth)}
+    if compare:
+        result['deepcopy'] = fixed_depth(_CountingReferenceAi, depth)
+        result['reference'] = fixed_depth(_CountingReferenceAi, depth,
+                                          reference.OthelloBoard)
+    return result
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    print(json.dumps(run(int(argv[0]) if argv else 4)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""Load test of the engine server: concurrent NBoard clients each asking
+for moves on the position suite, reporting requests/sec and latency
+percentiles. Starts a local server unless the address of a running one
+(python server.py --tcp HOST:PORT) is given. First checks that a game
+record as NBoard sends it, player tags included, is parsed.
+
+Run from the repository root with
+``python -m benchmarks.server [clients] [requests] [HOST:PORT]``.
+"""
+import asyncio
+import json
+import sys
+from time import perf_counter
+
+import server
+from benchmarks.latency import percentile
+from benchmarks.positions import suite
+from othelloboard import OthelloBoard
+
+# A game record as NBoard sends it with set game.
+NBOARD_GGF = ('(;GM[Othello]PC[NBoard]DT[2024-01-01 12:00:00 GMT]'
+              'PB[Edax]PW[NTest]RE[?]TI[5:00]TY[8]'
+              'BO[8 ---------------------------O*------*O--------------------'
+              '------- *]B[f5]W[d6//1.2]B[c3/0.5];)')
+
+
+def check_ggf():
+    board = server.parse_ggf(NBOARD_GGF)
+    expected = OthelloBoard()
+    for move in ('F5', 'D6', 'C3'):
+        expected.apply_move(move)
+    if (board.discs != expected.discs or
+            board.current_player != expected.current_player):
+        raise AssertionError('NBoard game record parsed wrongly')
+
+
+async def _client(host, port, boards, time_limit, latencies):
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(b'set time %g\n' % time_limit)
+    for board in boards:
+        writer.write(('set game %s\ngo\n' % server.to_ggf(board)).encode())
+        start = perf_counter()
+        await writer.drain()
+        while True:
+            line = (await reader.readline()).decode()
+            if not line:
+                raise ConnectionError('server closed the connection')
+            if line.startswith('===') or line.startswith('status error'):
+                break
+        latencies.append(perf_counter() - start)
+    writer.write(b'quit\n')
+    await writer.drain()
+    writer.close()
+
+
+async def _load(clients, requests, time_limit, workers, address):
+    boards = [board for board in suite() if board.current_player != 0]
+    pool = tcp = None
+    if address is None:
+        pool = server.EnginePool(workers, queue=clients)
+        pool.start()
+        tcp = await server.serve_tcp(pool, '127.0.0.1', 0)
+        host, port = tcp.sockets[0].getsockname()[:2]
+    else:
+        host, _, port = address.rpartition(':')
+    latencies = []
+    start = perf_counter()
+    try:
+        await asyncio.gather(*[
+            _client(host, int(port),
+                    [boards[(c + i) % len(boards)] for i in range(requests)],
+                    time_limit, latencies)
+            for c in range(clients)])
+    finally:
+        elapsed = perf_counter() - start
+        if tcp is not None:
+            tcp.close()
+            await tcp.wait_closed()
+            pool.close()
+    return latencies, elapsed
+
+
+def run(clients=8, requests=10, time_limit=0.2, workers=2, address=None):
+    check_ggf()
+    latencies, elapsed = asyncio.run(
+        _load(clients, requests, time_limit, workers, address))
+    return {'benchmark': 'server', 'clients': clients,
+            'workers': None if address else workers,
+            'time_limit': time_limit, 'requests': len(latencies),
+            'requests_per_sec': len(latencies) / elapsed,
+            'p50': percentile(latencies, 0.5),
+            'p90': percentile(latencies, 0.9),
+            'p99': percentile(latencies, 0.99)}
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    clients = int(argv[0]) if argv else 8
+    requests = int(argv[1]) if len(argv) > 1 else 10
+    address = argv[2] if len(argv) > 2 else None
+    print(json.dumps(run(clients, requests, address=address)))
+
+
+if __name__ == '__main__':
+    main()
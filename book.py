@@ -0,0 +1,156 @@
+"""Opening book: a builder that scores every position up to a given ply
+and a memory-mapped reader.
+
+Positions are normalised over the 8 board symmetries and keyed by the
+Zobrist hash of the normalised position. The file is a small header
+followed by fixed-size records sorted by key, so the reader binary
+searches the mapped file without parsing it.
+
+Build a book with:
+
+    python book.py --plies 8 --depth 4 --output book.bin
+"""
+import argparse
+import mmap
+import struct
+from math import inf
+
+from ai import Ai
+from othelloboard import OthelloBoard, indices, normalise, zobrist
+
+_MAGIC = b'OBK1'
+_HEADER = struct.Struct('<4sI')
+# Key, score for the side to move and best move in normalised orientation.
+_RECORD = struct.Struct('<QfB')
+
+
+def _coordinates(symmetry, index):
+    x, y = index % 8, index // 8
+    if symmetry & 4:
+        x, y = y, x
+    if symmetry & 2:
+        y = 7 - y
+    if symmetry & 1:
+        x = 7 - x
+    return y * 8 + x
+
+
+_SQUARE_MAPS = tuple(tuple(_coordinates(s, i) for i in range(64))
+                     for s in range(8))
+_INVERSE_MAPS = tuple(tuple(square_map.index(i) for i in range(64))
+                      for square_map in _SQUARE_MAPS)
+
+
+def position_key(board):
+    (black, white), symmetry = normalise(board.discs[1], board.discs[-1])
+    return zobrist({1: black, -1: white}, board.current_player), symmetry
+
+
+class BookBuilder(object):
+
+    def __init__(self, plies, depth):
+        self.plies = plies
+        self.depth = depth
+        self.entries = {}
+        self._ais = {player: Ai(None, player, 0) for player in (1, -1)}
+
+    def build(self):
+        board = OthelloBoard()
+        self._score(board, 0)
+        return self.entries
+
+    def _score(self, board, ply):
+        # Negamax value for the side to move. Positions inside the book
+        # are expanded; the ones on its border are scored by a search.
+        player = board.current_player
+        key, symmetry = position_key(board)
+        if key in self.entries:
+            return self.entries[key][0]
+        if ply == self.plies:
+            ai = self._ais[player]
+            ai._new_search()
+            score, _ = ai._minimax(board, self.depth, -inf, inf, player)
+            return score
+        best_score, best_move = -inf, None
+        for move in list(indices(board.move_mask(player))):
+            undo = board.play(move)
+            if board.current_player == 0:
+                # A finished game (a wipe-out this early) scores its final
+                # disc difference on the scale of evaluation.evaluate.
+                score = 100000 * (board.score[player] - board.score[-player])
+            else:
+                score = self._score(board, ply + 1)
+                if board.current_player != player:
+                    score = -score
+            board.undo_move(undo)
+            if score > best_score:
+                best_score, best_move = score, move
+        self.entries[key] = (best_score, _SQUARE_MAPS[symmetry][best_move])
+        return best_score
+
+    def write(self, path):
+        with open(path, 'wb') as f:
+            f.write(_HEADER.pack(_MAGIC, len(self.entries)))
+            for key in sorted(self.entries):
+                score, move = self.entries[key]
+                f.write(_RECORD.pack(key, score, move))
+
+
+class OpeningBook(object):
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self._count = _HEADER.unpack_from(self._map, 0)
+        if magic != _MAGIC:
+            raise ValueError('%s is not an opening book' % path)
+
+    def __len__(self):
+        return self._count
+
+    def close(self):
+        self._map.close()
+
+    def _find(self, key):
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            offset = _HEADER.size + middle * _RECORD.size
+            found, score, move = _RECORD.unpack_from(self._map, offset)
+            if found == key:
+                return score, move
+            if found < key:
+                low = middle + 1
+            else:
+                high = middle
+        return None
+
+    def probe(self, board):
+        # (score, move index) for the side to move, or None.
+        if board.current_player == 0:
+            return None
+        key, symmetry = position_key(board)
+        entry = self._find(key)
+        if entry is None:
+            return None
+        score, move = entry
+        return score, _INVERSE_MAPS[symmetry][move]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Build an opening book.')
+    parser.add_argument('--plies', type=int, default=6,
+                        help='plies from the start position to expand')
+    parser.add_argument('--depth', type=int, default=3,
+                        help='search depth scoring the border positions')
+    parser.add_argument('--output', default='book.bin')
+    args = parser.parse_args(argv)
+    builder = BookBuilder(args.plies, args.depth)
+    builder.build()
+    builder.write(args.output)
+    print('%d positions written to %s' % (len(builder.entries), args.output))
+
+
+if __name__ == '__main__':
+    main()
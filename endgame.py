@@ -0,0 +1,101 @@
+from math import inf
+from time import time
+
+from evaluation import MOVE_WEIGHTS
+from othelloboard import FULL, flip_mask, indices, move_mask
+
+# The four 4x4 quadrants of the board. Moving into a quadrant with an odd
+# number of empties tends to leave the opponent without the last move
+# there, so those squares are tried first.
+_QUADRANTS = (0x000000000F0F0F0F, 0x00000000F0F0F0F0,
+              0x0F0F0F0F00000000, 0xF0F0F0F000000000)
+_QUADRANT_OF = tuple(next(q for q, mask in enumerate(_QUADRANTS)
+                          if mask >> i & 1) for i in range(64))
+
+
+class SolverTimeout(Exception):
+    pass
+
+
+class EndgameSolver(object):
+
+    # Above this many empties children are ordered fastest-first, by the
+    # opponent's mobility after the move; below it parity order is used.
+    fastest_first = 7
+    check_interval = 1024
+
+    def __init__(self):
+        self.nodes = 0
+        self._deadline = inf
+
+    def solve(self, board, player, wld=False, deadline=inf):
+        # Perfect play from the position of player, who must be to move.
+        # Returns the final disc difference (own - opponent) with its best
+        # move, or with wld only its sign: 1 win, 0 draw, -1 loss.
+        self.nodes = 0
+        self._deadline = deadline
+        own = board.discs[player]
+        opp = board.discs[player * -1]
+        empty = ~(own | opp) & FULL
+        empties = sorted(indices(empty), key=MOVE_WEIGHTS.__getitem__,
+                         reverse=True)
+        alpha, beta = (-1, 1) if wld else (-64, 64)
+        best_score, best_move = -inf, None
+        for move, flips in self._children(own, opp, empties):
+            score = -self._negamax(opp ^ flips, own | flips | 1 << move,
+                                   [e for e in empties if e != move],
+                                   -beta, -alpha, False)
+            if score > best_score:
+                best_score, best_move = score, move
+            alpha = max(alpha, score)
+            if alpha >= beta:
+                break
+        if wld:
+            best_score = (best_score > 0) - (best_score < 0)
+        return best_score, best_move
+
+    def _children(self, own, opp, empties):
+        empty = ~(own | opp) & FULL
+        odd = [(empty & quadrant).bit_count() & 1 for quadrant in _QUADRANTS]
+        if len(empties) > self.fastest_first:
+            children = []
+            for move in indices(move_mask(own, opp)):
+                flips = flip_mask(move, own, opp)
+                mobility = move_mask(opp ^ flips,
+                                     own | flips | 1 << move).bit_count()
+                children.append((mobility, not odd[_QUADRANT_OF[move]],
+                                 move, flips))
+            children.sort()
+            return [(move, flips) for _, _, move, flips in children]
+        children = []
+        for parity in (1, 0):
+            for move in empties:
+                if odd[_QUADRANT_OF[move]] == parity:
+                    flips = flip_mask(move, own, opp)
+                    if flips:
+                        children.append((move, flips))
+        return children
+
+    def _negamax(self, own, opp, empties, alpha, beta, passed):
+        self.nodes += 1
+        if (self.nodes % self.check_interval == 0 and
+                time() > self._deadline):
+            raise SolverTimeout()
+        if not empties:
+            return own.bit_count() - opp.bit_count()
+        best_score = -inf
+        for move, flips in self._children(own, opp, empties):
+            score = -self._negamax(opp ^ flips, own | flips | 1 << move,
+                                   [e for e in empties if e != move],
+                                   -beta, -alpha, False)
+            if score > best_score:
+                best_score = score
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+        if best_score == -inf:
+            if passed:
+                return own.bit_count() - opp.bit_count()
+            return -self._negamax(opp, own, empties, -beta, -alpha, True)
+        return best_score
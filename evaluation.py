@@ -0,0 +1,184 @@
+from othelloboard import DIRECTIONS, FULL
+import patterns
+
+# Square weights in board index order ('A1'..'H1', 'A2'..'H2', ...).
+POSITION_WEIGHTS = (
+    500, -100, 100, 50, 50, 100, -100, 500,
+    -100, -200, -50, -50, -50, -50, -200, -100,
+    100, -50, 100, 0, 0, 100, -50, 100,
+    50, -50, 0, 0, 0, 0, -50, 50,
+    50, -50, 0, 0, 0, 0, -50, 50,
+    100, -50, 100, 0, 0, 100, -50, 100,
+    -100, -200, -50, -50, -50, -50, -200, -100,
+    500, -100, 100, 50, 50, 100, -100, 500,
+)
+
+# Move ordering weights: the position weights with corners at 200.
+MOVE_WEIGHTS = tuple(200 if i in (0, 7, 56, 63) else weight
+                     for i, weight in enumerate(POSITION_WEIGHTS))
+
+# Squares whose weight drops to zero once the corner is taken, for the
+# corners A1, H1, A8 and H8 in that order.
+_A1_REGION = ((1, 0), (2, 0), (3, 0), (0, 1), (1, 1), (2, 1), (3, 1),
+              (0, 2), (1, 2), (2, 2), (0, 3), (1, 3))
+_CORNER_REGIONS = tuple(
+    tuple((7 - x if mx else x) + 8 * (7 - y if my else y)
+          for x, y in _A1_REGION)
+    for mx, my in ((0, 0), (1, 0), (0, 1), (1, 1)))
+
+
+def _weight_rows(state):
+    weights = list(POSITION_WEIGHTS)
+    for corner, region in enumerate(_CORNER_REGIONS):
+        if state >> corner & 1:
+            for i in region:
+                weights[i] = 0
+    rows = []
+    for row in range(8):
+        sums = [0] * 256
+        for byte in range(1, 256):
+            low = byte & -byte
+            sums[byte] = sums[byte ^ low] + weights[
+                row * 8 + low.bit_length() - 1]
+        rows.append(tuple(sums))
+    return tuple(rows)
+
+
+# Per corner-occupancy state (bit 0..3 set when A1, H1, A8, H8 is taken),
+# the summed weights of every disc pattern within each row.
+_WEIGHT_ROWS = tuple(_weight_rows(state) for state in range(16))
+
+
+def _run(byte, bits):
+    run = 0
+    for bit in bits:
+        if not byte & bit:
+            break
+        run |= bit
+    return run
+
+
+# Contiguous discs of an edge row starting from its A or H corner.
+_RUN_FROM_A = tuple(_run(byte, [1 << i for i in range(8)])
+                    for byte in range(256))
+_RUN_FROM_H = tuple(_run(byte, [1 << i for i in range(7, -1, -1)])
+                    for byte in range(256))
+
+
+def corner_state(occupied):
+    return ((occupied & 1) | (occupied >> 6 & 2) | (occupied >> 54 & 4) |
+            (occupied >> 60 & 8))
+
+
+def position_weights(own, occupied):
+    rows = _WEIGHT_ROWS[corner_state(occupied)]
+    return (rows[0][own & 0xFF] + rows[1][own >> 8 & 0xFF] +
+            rows[2][own >> 16 & 0xFF] + rows[3][own >> 24 & 0xFF] +
+            rows[4][own >> 32 & 0xFF] + rows[5][own >> 40 & 0xFF] +
+            rows[6][own >> 48 & 0xFF] + rows[7][own >> 56])
+
+
+def flip_count(own, opp):
+    # Number of discs flipped summed over every legal move of own. In one
+    # direction each opponent disc belongs to at most one move's run, so
+    # the total is the popcount of the discs flanked by own on one side and
+    # by an empty square on the other.
+    empty = ~(own | opp) & FULL
+    count = 0
+    for shift, mask in DIRECTIONS:
+        o = opp & mask
+        a = o & (own >> shift)
+        a |= o & (a >> shift)
+        a |= o & (a >> shift)
+        a |= o & (a >> shift)
+        a |= o & (a >> shift)
+        a |= o & (a >> shift)
+        b = o & (empty << shift)
+        b |= o & (b << shift)
+        b |= o & (b << shift)
+        b |= o & (b << shift)
+        b |= o & (b << shift)
+        b |= o & (b << shift)
+        count += (a & b).bit_count()
+        a = o & (own << shift)
+        a |= o & (a << shift)
+        a |= o & (a << shift)
+        a |= o & (a << shift)
+        a |= o & (a << shift)
+        a |= o & (a << shift)
+        b = o & (empty >> shift)
+        b |= o & (b >> shift)
+        b |= o & (b >> shift)
+        b |= o & (b >> shift)
+        b |= o & (b >> shift)
+        b |= o & (b >> shift)
+        count += (a & b).bit_count()
+    return count
+
+
+def mobility(own, opp):
+    own_moves = flip_count(own, opp)
+    op_moves = flip_count(opp, own)
+    return 100 * (own_moves - op_moves) / (own_moves + op_moves + 1)
+
+
+def stable_discs(own):
+    # For every disc in the edge run of a corner, the discs stacked on it
+    # towards the opposite edge.
+    stables = 0
+    row = own & 0xFF
+    for run in (_RUN_FROM_A[row], _RUN_FROM_H[row]):
+        while run:
+            run = run << 8 & own
+            stables += run.bit_count()
+    row = own >> 56
+    for run in (_RUN_FROM_A[row], _RUN_FROM_H[row]):
+        run <<= 56
+        while run:
+            run = run >> 8 & own
+            stables += run.bit_count()
+    return stables
+
+
+def corner_bonus(own, opp):
+    return stable_discs(own) - stable_discs(opp)
+
+
+def disc_difference(own_count, opp_count):
+    return 100 * (own_count - opp_count) / (own_count + opp_count)
+
+
+def last_disc(own_count, opp_count):
+    return -1 if (64 - own_count - opp_count) % 2 else 1
+
+
+def evaluate(board, player):
+    # The corner term of the original evaluator always came out as 0, so it
+    # is left out here; adding 0.0 would not change any score.
+    own_count = board.score[player]
+    opp_count = board.score[player * -1]
+    if board.current_player == 0:
+        return 100000 * (own_count - opp_count)
+    own = board.discs[player]
+    opp = board.discs[player * -1]
+    discs = own_count + opp_count
+    score = 0
+    if discs < 19:
+        score += 5 * mobility(own, opp)
+        score += 20 * position_weights(own, own | opp)
+        score += 10000 * corner_bonus(own, opp)
+    elif discs < 57:
+        score += 10 * disc_difference(own_count, opp_count)
+        score += 2 * mobility(own, opp)
+        score += 10 * position_weights(own, own | opp)
+        score += 100 * last_disc(own_count, opp_count)
+        score += 10000 * corner_bonus(own, opp)
+    else:
+        score += 500 * disc_difference(own_count, opp_count)
+        score += 500 * last_disc(own_count, opp_count)
+        score += 10000 * corner_bonus(own, opp)
+    return score
+
+
+# Evaluators selectable by name, e.g. Ai(..., evaluation='standard').
+EVALUATORS = {'standard': evaluate, 'pattern': patterns.evaluate}
@@ -1,93 +1,192 @@
+import argparse
+import json
+from collections import deque
+from time import perf_counter
 from tkinter import Tk, Canvas
 from othelloboard import OthelloBoard
 from ai import Ai
+from ponder import BackgroundSearch, Ponderer
+
+
+def _ms(seconds):
+    return None if seconds is None else 1000 * seconds
 
 
 class OthelloGui(object):
 
+    # Milliseconds between checks on the AI's search.
+    poll_interval = 20
+
     def __init__(self, root):
         self.root = root
         self.screen = Canvas(root, width=500, height=500,
                              background="#008000")
         self.board = OthelloBoard()
         self.player_id = 0
+        self.ponderer = None
+        self.thinker = None
+        self._thinking = False
+        self._turn = 0
+        self.redraw_times = []
+        self.lags = deque(maxlen=3000)
         self._setup()
+        self._heartbeat(perf_counter())
 
     def _reset_game(self):
+        self._stop_searches()
         self.board.reset_board()
         self._setup()
 
+    def _quit(self):
+        self._stop_searches()
+        self.root.destroy()
+
+    def _ponder(self):
+        # The AI searches the replies to the player's likely moves while
+        # the player thinks.
+        if self.board.current_player == self.player_id:
+            self.ponderer.start(self.board)
+
+    def _stop_searches(self):
+        self._thinking = False
+        if self.ponderer is not None:
+            self.ponderer.stop()
+            self.thinker.stop()
+
     def _player_turn(self, xy):
+        self.ponderer.stop()
         self.board.apply_move(xy)
         self._update_graphics()
+        self._ponder()
 
     def _ai_turn(self):
-        self.board.apply_move(self.ai.time_limit_move())
+        # The search runs in a worker thread; _poll_ai picks up its move
+        # from the event loop.
+        self._thinking = True
+        self._turn += 1
+        self._think_start = perf_counter()
+        self.thinker.start(self.ai.time_limit_move)
+        self.root.after(self.poll_interval, self._poll_ai, self._turn)
+
+    def _poll_ai(self, turn):
+        if not self._thinking or turn != self._turn:
+            return
+        if self.thinker.active:
+            dots = int((perf_counter() - self._think_start) / 0.3) % 4
+            self.screen.itemconfigure(self._thinking_text,
+                                      text="THINKING" + "." * dots,
+                                      state="normal")
+            self.root.after(self.poll_interval, self._poll_ai, turn)
+            return
+        self._thinking = False
+        self.screen.itemconfigure(self._thinking_text, state="hidden")
+        self.board.apply_move(self.thinker.result)
         self._update_graphics()
+        self._ponder()
 
-    def _update_graphics(self):
-        self.screen.delete("graphics")
-        player = self.board.current_player
-        color = {-1: "#ffffff", 1: "#111111", None: "#008000"}
-        shadow = {-1: "#aaaaaa", 1: "#000000", None: "#008000"}
+    def _heartbeat(self, expected):
+        # Lateness of the event loop, sampled every poll_interval ms.
+        now = perf_counter()
+        self.lags.append(now - expected)
+        self.root.after(self.poll_interval, self._heartbeat,
+                        now + self.poll_interval / 1000)
+
+    def stats(self):
+        def percentile(values, p):
+            values = sorted(values)
+            return values[int(p * (len(values) - 1))] if values else None
+        return {'redraws': len(self.redraw_times),
+                'redraw_ms_p50': _ms(percentile(self.redraw_times, 0.5)),
+                'redraw_ms_max': _ms(max(self.redraw_times, default=None)),
+                'loop_lag_ms_p99': _ms(percentile(self.lags, 0.99)),
+                'loop_lag_ms_max': _ms(max(self.lags, default=None))}
 
-        for x in range(8):
-            for y in range(8):
-                disc = self.board.get_disc_value(chr(ord('A') + x) + str(y+1))
+    def _create_items(self):
+        # One shadow, disc and move hint oval per square, created once and
+        # recoloured by _update_graphics when the square changes.
+        self._squares = []
+        for index in range(64):
+            x, y = index % 8, index // 8
+            self._squares.append((
                 self.screen.create_oval(54+50*x, 54+50*y, 96+50*x, 96+50*y,
-                                        tags="graphics",
-                                        fill=shadow[disc],
-                                        outline=shadow[disc])
+                                        tags="graphics", state="hidden"),
                 self.screen.create_oval(54+50*x, 52+50*y, 96+50*x, 94+50*y,
-                                        tags="graphics",
-                                        fill=color[disc],
-                                        outline=color[disc])
-        if player == self.player_id:
-            for x, y in self.board.moves[player]:
-                x = ord(x) - ord('A')
-                y = int(y) - 1
+                                        tags="graphics", state="hidden"),
                 self.screen.create_oval(70+50*x, 70+50*y, 80+50*x, 80+50*y,
-                                        tags="graphics",
+                                        tags="graphics", state="hidden",
                                         fill='#ff3300',
-                                        outline='#ff3300')
+                                        outline='#ff3300')))
+        self._drawn = [(None, False)] * 64
+        self._scores = {
+            -1: self.screen.create_text(110, 475, tags="graphics",
+                                        font=("Consolas", 40),
+                                        fill="white"),
+            1: self.screen.create_text(390, 475, tags="graphics",
+                                       font=("Consolas", 40),
+                                       fill="black")}
+        self._game_over = self.screen.create_text(250, 25, tags="graphics",
+                                                  font=("Consolas", 40),
+                                                  fill="black",
+                                                  text="GAME OVER",
+                                                  state="hidden")
+        self._thinking_text = self.screen.create_text(
+            250, 475, tags="graphics", font=("Consolas", 16), fill="white",
+            text="THINKING", state="hidden")
+        self._turn_items = (
+            self.screen.create_oval(230, 5, 270, 45, tags="graphics"),
+            self.screen.create_rectangle(175, 22, 200, 28, tags="graphics"),
+            self.screen.create_rectangle(300, 22, 325, 28, tags="graphics"),
+            self.screen.create_polygon(300, 15, 300, 35, 280, 25,
+                                       tags="graphics"),
+            self.screen.create_polygon(200, 15, 200, 35, 220, 25,
+                                       tags="graphics"))
 
-        self.screen.create_text(110, 475, tags="graphics",
-                                font=("Consolas", 40),
-                                fill="white",
-                                text=self.board.score[-1])
-        self.screen.create_text(390, 475, tags="graphics",
-                                font=("Consolas", 40),
-                                fill="black",
-                                text=self.board.score[1])
+    def _update_graphics(self):
+        start = perf_counter()
+        player = self.board.current_player
+        color = {-1: "#ffffff", 1: "#111111"}
+        shadow = {-1: "#aaaaaa", 1: "#000000"}
+        black, white = self.board.discs[1], self.board.discs[-1]
+        hints = self.board.move_mask(player) if player == self.player_id \
+            else 0
 
-        if player == 0:
-            self.screen.create_text(250, 25, tags="graphics",
-                                    font=("Consolas", 40),
-                                    fill="black",
-                                    text="GAME OVER")
+        for index, (drawn_disc, drawn_hint) in enumerate(self._drawn):
+            disc = 1 if black >> index & 1 else -1 if white >> index & 1 \
+                else None
+            hint = bool(hints >> index & 1)
+            if disc == drawn_disc and hint == drawn_hint:
+                continue
+            self._drawn[index] = (disc, hint)
+            shadow_item, disc_item, hint_item = self._squares[index]
+            if disc != drawn_disc:
+                if disc is None:
+                    self.screen.itemconfigure(shadow_item, state="hidden")
+                    self.screen.itemconfigure(disc_item, state="hidden")
+                else:
+                    self.screen.itemconfigure(shadow_item, state="normal",
+                                              fill=shadow[disc],
+                                              outline=shadow[disc])
+                    self.screen.itemconfigure(disc_item, state="normal",
+                                              fill=color[disc],
+                                              outline=color[disc])
+            if hint != drawn_hint:
+                self.screen.itemconfigure(
+                    hint_item, state="normal" if hint else "hidden")
 
-        else:
-            self.screen.create_oval(230, 5, 270, 45,
-                                    tags="graphics",
-                                    fill=color[player],
-                                    outline=color[player])
-            self.screen.create_rectangle(175, 22, 200, 28,
-                                         tags="graphics",
-                                         fill=color[player],
-                                         outline=color[player])
-            self.screen.create_rectangle(300, 22, 325, 28,
-                                         tags="graphics",
-                                         fill=color[player],
-                                         outline=color[player])
+        for side, item in self._scores.items():
+            self.screen.itemconfigure(item, text=self.board.score[side])
 
-            self.screen.create_polygon(300, 15, 300, 35, 280, 25,
-                                       tags="graphics",
-                                       fill=color[player],
-                                       outline=color[player])
-            self.screen.create_polygon(200, 15, 200, 35, 220, 25,
-                                       tags="graphics",
-                                       fill=color[player],
-                                       outline=color[player])
+        if player == 0:
+            self.screen.itemconfigure(self._game_over, state="normal")
+            for item in self._turn_items:
+                self.screen.itemconfigure(item, state="hidden")
+        else:
+            self.screen.itemconfigure(self._game_over, state="hidden")
+            for item in self._turn_items:
+                self.screen.itemconfigure(item, state="normal",
+                                          fill=color[player],
+                                          outline=color[player])
+        self.redraw_times.append(perf_counter() - start)
 
     def _draw_gameboard(self):
         # background
@@ -161,7 +260,7 @@ class OthelloGui(object):
     def _clickHandle(self, event):
         if self._game_started:
             if event.x >= 450 and event.y <= 50:
-                self.root.destroy()
+                self._quit()
             elif event.x <= 50 and event.y <= 50:
                 self._reset_game()
             elif self.board.current_player == self.player_id:
@@ -182,7 +281,8 @@ class OthelloGui(object):
 
     def _game_loop(self):
         if self._game_started:
-            if self.board.current_player == self.player_id * -1:
+            if (self.board.current_player == self.player_id * -1 and
+                    not self._thinking):
                 self._ai_turn()
             elif self.board.current_player == 0:
                 pass
@@ -192,17 +292,28 @@ class OthelloGui(object):
         self.screen.pack()
         self._game_started = False
         self.screen.bind("<Button-1>", self._clickHandle)
+        self.root.protocol("WM_DELETE_WINDOW", self._quit)
         self.root.wm_title("Othello")
         self._draw_player_select()
 
     def _start_game(self):
         self._game_started = True
+        self.ponderer = Ponderer(self.ai)
+        self.thinker = BackgroundSearch(self.ai)
         self._draw_gameboard()
+        self._create_items()
         self._update_graphics()
+        self._ponder()
         self._game_loop()
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Play Othello.')
+    parser.add_argument('--stats', action='store_true',
+                        help='print redraw times and event loop lag on exit')
+    args = parser.parse_args()
     root = Tk()
-    OthelloGui(root)
+    gui = OthelloGui(root)
     root.mainloop()
+    if args.stats:
+        print(json.dumps(gui.stats()))
@@ -0,0 +1,91 @@
+from evaluation import MOVE_WEIGHTS
+from math import inf
+
+
+class StaticOrdering(object):
+    # Hash move first, then the fixed square weights. Also counts beta
+    # cutoffs by the index of the move that caused them.
+
+    def __init__(self):
+        self.cutoff_indices = [0] * 64
+
+    @property
+    def cutoffs(self):
+        return sum(self.cutoff_indices)
+
+    @property
+    def first_move_cutoffs(self):
+        return self.cutoff_indices[0]
+
+    def new_search(self):
+        self.cutoff_indices = [0] * 64
+
+    def order(self, ai, board, moves, depth, first, player):
+        ordered = sorted(moves, key=MOVE_WEIGHTS.__getitem__, reverse=True)
+        if first in ordered:
+            ordered.remove(first)
+            ordered.insert(0, first)
+        return ordered
+
+    def cutoff(self, board, move, index, depth):
+        self.cutoff_indices[index] += 1
+
+
+class KillerHistoryOrdering(StaticOrdering):
+    # Hash move, then the two killer moves of the ply, then the moves with
+    # the highest history score, with square weights breaking ties. Plies
+    # are told apart by disc count, which siblings always share.
+
+    def __init__(self):
+        super().__init__()
+        self.killers = {}
+        self.history = {1: [0] * 64, -1: [0] * 64}
+
+    def new_search(self):
+        super().new_search()
+        self.killers = {}
+        for history in self.history.values():
+            for i in range(64):
+                history[i] >>= 1
+
+    def order(self, ai, board, moves, depth, first, player):
+        killers = self.killers.get(board.score[1] + board.score[-1], ())
+        history = self.history[board.current_player]
+
+        def key(move):
+            return (move == first, move in killers, history[move],
+                    MOVE_WEIGHTS[move])
+        return sorted(moves, key=key, reverse=True)
+
+    def cutoff(self, board, move, index, depth):
+        super().cutoff(board, move, index, depth)
+        ply = board.score[1] + board.score[-1]
+        killers = self.killers.get(ply, ())
+        if not killers or killers[0] != move:
+            self.killers[ply] = (move,) + killers[:1]
+        self.history[board.current_player][move] += depth * depth
+
+
+class ShallowSearchOrdering(KillerHistoryOrdering):
+    # From min_depth upwards, children are ordered by a reduced-depth
+    # search instead; the hash move still goes first.
+
+    min_depth = 4
+
+    def order(self, ai, board, moves, depth, first, player):
+        if depth < self.min_depth:
+            return super().order(ai, board, moves, depth, first, player)
+        scores = {}
+        for move in moves:
+            undo = board.play(move)
+            scores[move] = ai._minimax(board, depth // 4, -inf, inf,
+                                       player)[0]
+            board.undo_move(undo)
+        sign = 1 if board.current_player == player else -1
+        return sorted(scores, key=lambda move: (
+            move == first, sign * scores[move]), reverse=True)
+
+
+ORDERINGS = {'static': StaticOrdering,
+             'killer': KillerHistoryOrdering,
+             'shallow': ShallowSearchOrdering}
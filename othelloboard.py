@@ -1,15 +1,186 @@
+import random
+import struct
+
+FULL = 0xFFFFFFFFFFFFFFFF
+
+# Squares are indexed 0..63 row by row, so 'A1' is 0, 'H1' is 7 and 'H8'
+# is 63. Bit i of a bitboard is set when square i holds a disc.
+SQUARES = tuple(x + str(y + 1) for y in range(8) for x in 'ABCDEFGH')
+_INDEX = {xy: i for i, xy in enumerate(SQUARES)}
+_INDEX.update({xy.lower(): i for i, xy in enumerate(SQUARES)})
+
+# Shift and mask per direction pair. The mask keeps only discs that can be
+# flanked in that direction, so a shifted run never wraps around an edge.
+DIRECTIONS = ((1, 0x7E7E7E7E7E7E7E7E),
+               (8, 0x00FFFFFFFFFFFF00),
+               (7, 0x007E7E7E7E7E7E00),
+               (9, 0x007E7E7E7E7E7E00))
+
+
+def _rays(index):
+    x, y = index % 8, index // 8
+    rays = []
+    for dx, dy in [[1, 0], [1, 1], [0, 1], [-1, 1],
+                   [-1, 0], [-1, -1], [0, -1], [1, -1]]:
+        ray = []
+        tx, ty = x + dx, y + dy
+        while 0 <= tx <= 7 and 0 <= ty <= 7:
+            ray.append(1 << (ty * 8 + tx))
+            tx += dx
+            ty += dy
+        if len(ray) > 1:
+            rays.append(tuple(ray))
+    return tuple(rays)
+
+
+_RAYS = tuple(_rays(i) for i in range(64))
+
+# Serialised position: black and white bitboards and the side to move.
+POSITION = struct.Struct('<QQb')
+
+# Zobrist keys: one per square and colour plus one per side to move. The
+# keys are also tabulated per row and byte of a bitboard so a whole row is
+# hashed in one lookup. A flip toggles both colour keys of a square, so
+# the flip tables hold their XOR.
+_rng = random.Random(0x07E110)
+ZOBRIST = {player: tuple(_rng.getrandbits(64) for _ in range(64))
+           for player in (1, -1)}
+ZOBRIST_SIDE = {player: _rng.getrandbits(64) for player in (1, -1, 0)}
+
+
+def _byte_keys(row, square_keys):
+    keys = [0] * 256
+    for byte in range(1, 256):
+        low = byte & -byte
+        keys[byte] = keys[byte ^ low] ^ square_keys[
+            row * 8 + low.bit_length() - 1]
+    return tuple(keys)
+
+
+_DISC_KEYS = {player: tuple(_byte_keys(row, ZOBRIST[player])
+                            for row in range(8))
+              for player in (1, -1)}
+_FLIP_KEYS = tuple(_byte_keys(row, [a ^ b for a, b in zip(ZOBRIST[1],
+                                                          ZOBRIST[-1])])
+                   for row in range(8))
+
+
+def _mask_key(tables, mask):
+    key = 0
+    row = 0
+    while mask:
+        byte = mask & 0xFF
+        if byte:
+            key ^= tables[row][byte]
+        mask >>= 8
+        row += 1
+    return key
+
+
+def zobrist(discs, current_player):
+    return (ZOBRIST_SIDE[current_player] ^
+            _mask_key(_DISC_KEYS[1], discs[1]) ^
+            _mask_key(_DISC_KEYS[-1], discs[-1]))
+
+
+def move_mask(own, opp):
+    empty = ~(own | opp) & FULL
+    moves = 0
+    for shift, mask in DIRECTIONS:
+        o = opp & mask
+        t = o & (own << shift)
+        t |= o & (t << shift)
+        t |= o & (t << shift)
+        t |= o & (t << shift)
+        t |= o & (t << shift)
+        t |= o & (t << shift)
+        moves |= t << shift
+        t = o & (own >> shift)
+        t |= o & (t >> shift)
+        t |= o & (t >> shift)
+        t |= o & (t >> shift)
+        t |= o & (t >> shift)
+        t |= o & (t >> shift)
+        moves |= t >> shift
+    return moves & empty
+
+
+def flip_mask(index, own, opp):
+    flips = 0
+    for ray in _RAYS[index]:
+        line = 0
+        for bit in ray:
+            if opp & bit:
+                line |= bit
+            else:
+                if own & bit:
+                    flips |= line
+                break
+    return flips
+
+
+def indices(mask):
+    while mask:
+        bit = mask & -mask
+        yield bit.bit_length() - 1
+        mask ^= bit
+
+
+# Symmetries of a bitboard: mirror the rows, the columns or swap them.
+def flip_vertical(x):
+    return int.from_bytes(x.to_bytes(8, 'little'), 'big')
+
+
+def mirror_horizontal(x):
+    x = (x >> 1) & 0x5555555555555555 | (x & 0x5555555555555555) << 1
+    x = (x >> 2) & 0x3333333333333333 | (x & 0x3333333333333333) << 2
+    return (x >> 4) & 0x0F0F0F0F0F0F0F0F | (x & 0x0F0F0F0F0F0F0F0F) << 4
+
+
+def transpose(x):
+    t = 0x0F0F0F0F00000000 & (x ^ (x << 28))
+    x ^= t ^ (t >> 28)
+    t = 0x3333000033330000 & (x ^ (x << 14))
+    x ^= t ^ (t >> 14)
+    t = 0x5500550055005500 & (x ^ (x << 7))
+    return x ^ t ^ (t >> 7)
+
+
+def transform(symmetry, x):
+    if symmetry & 4:
+        x = transpose(x)
+    if symmetry & 2:
+        x = flip_vertical(x)
+    if symmetry & 1:
+        x = mirror_horizontal(x)
+    return x
+
+
+def _images(x):
+    # All 8 images of x, indexed by symmetry.
+    images = []
+    for base in (x, transpose(x)):
+        for image in (base, flip_vertical(base)):
+            images.append(image)
+            images.append(mirror_horizontal(image))
+    return images
+
+
+def normalise(black, white):
+    # The smallest of the 8 symmetric images and the symmetry producing it.
+    return min(zip(zip(_images(black), _images(white)), range(8)))
+
+
 class OthelloBoard(object):
 
     def __init__(self):
         self.score = {}
+        self.discs = {}
         self.current_player = -1
-        self.moves = {}
         self.reset_board()
 
     def reset_board(self):
-        self._possible = set()
-        self.taken = set()
-        self._gameboard = [[None for _ in range(8)] for _ in range(8)]
+        self.discs = {1: 0, -1: 0}
         self.current_player = -1
         self._add_disc('D4')
         self._add_disc('E5')
@@ -17,94 +188,124 @@ class OthelloBoard(object):
         self._add_disc('D5')
         self._add_disc('E4')
         self.score = {-1: 2, 1: 2}
-        self._update_moves()
+        self.hash = zobrist(self.discs, self.current_player)
+        self._clear_cache()
+
+    @classmethod
+    def from_discs(cls, black, white, current_player):
+        board = cls.__new__(cls)
+        board.discs = {1: black, -1: white}
+        board.score = {1: black.bit_count(), -1: white.bit_count()}
+        board.current_player = current_player
+        board.hash = zobrist(board.discs, current_player)
+        board._clear_cache()
+        return board
+
+    @classmethod
+    def from_bytes(cls, data):
+        return cls.from_discs(*POSITION.unpack(data))
+
+    def to_bytes(self):
+        return POSITION.pack(self.discs[1], self.discs[-1],
+                             self.current_player)
 
     def _to_num(self, xy):
-        x, y = xy
-        LUT = {'A': 1, 'B': 2, 'C': 3, 'D': 4, 'E': 5, 'F': 6, 'G': 7, 'H': 8}
-        return LUT[x.upper()] - 1, int(y) - 1
+        return _INDEX[xy]
+
+    def _to_str(self, index):
+        return SQUARES[index]
+
+    def _clear_cache(self):
+        self._masks = {}
+        self._moves = None
 
-    def _to_str(self, x, y):
-        LUT = {1: 'A', 2: 'B', 3: 'C', 4: 'D', 5: 'E', 6: 'F', 7: 'G', 8: 'H'}
-        return LUT[x+1] + str(y+1)
+    @property
+    def taken(self):
+        occupied = self.discs[1] | self.discs[-1]
+        return {SQUARES[i] for i in indices(occupied)}
+
+    @property
+    def moves(self):
+        if self._moves is None:
+            self._moves = {1: self._get_moves(1), -1: self._get_moves(-1)}
+        return self._moves
 
     def get_disc_value(self, xy):
-        x, y = self._to_num(xy)
-        return self._gameboard[x][y]
-
-    def _update_possibles(self, xy):
-        self.taken.add(xy)
-        if xy in self._possible:
-            self._possible.remove(xy)
-        x, y = self._to_num(xy)
-        for dx, dy in [[1, 0], [1, 1], [0, 1], [-1, 1],
-                       [-1, 0], [-1, -1], [0, -1], [1, -1]]:
-            tx = x + dx
-            ty = y + dy
-            if self._on_board(tx, ty) and self._to_str(tx, ty) not in self.taken:
-                self._possible.add(self._to_str(tx, ty))
-
-    def _get_discs(self, xy, player):
-        x, y = self._to_num(xy)
-        discs_to_flip = []
-        if self._gameboard[x][y] is not None:
-            return discs_to_flip
-
-        for dx, dy in [[1, 0], [1, 1], [0, 1], [-1, 1],
-                       [-1, 0], [-1, -1], [0, -1], [1, -1]]:
-            tx = x + dx
-            ty = y + dy
-            op_discs = []
-            while self._on_board(tx, ty) and self._gameboard[tx][ty] is not None:
-                disc = self._gameboard[tx][ty]
-                if disc == player:
-                    if op_discs:
-                        discs_to_flip += op_discs
-                    break
-                else:
-                    op_discs.append(self._to_str(tx, ty))
-
-                tx += dx
-                ty += dy
-
-        return discs_to_flip
-
-    def _update_moves(self):
-        self.moves[1] = self._get_moves(1)
-        self.moves[-1] = self._get_moves(-1)
+        bit = 1 << self._to_num(xy)
+        if self.discs[1] & bit:
+            return 1
+        if self.discs[-1] & bit:
+            return -1
+        return None
+
+    def move_mask(self, player):
+        mask = self._masks.get(player)
+        if mask is None:
+            mask = move_mask(self.discs[player], self.discs[player * -1])
+            self._masks[player] = mask
+        return mask
+
+    def _get_discs(self, index, player):
+        return flip_mask(index, self.discs[player], self.discs[player * -1])
 
     def _get_moves(self, player):
         moves = {}
-        for cord in self._possible:
-            discs = self._get_discs(cord, player)
-            if discs:
-                moves[cord] = discs
+        for index in indices(self.move_mask(player)):
+            flips = self._get_discs(index, player)
+            moves[SQUARES[index]] = [SQUARES[i] for i in indices(flips)]
         return moves
 
     def _update_player(self):
-        if self.moves[self.current_player * -1]:
+        if self.move_mask(self.current_player * -1):
             self.current_player *= -1
-        elif not self.moves[self.current_player]:
+        elif not self.move_mask(self.current_player):
             self.current_player = 0
 
     def apply_move(self, xy):
-        discs = self.moves[self.current_player][xy]
-        self._add_disc(xy)
-        self._flip_discs(discs)
-        self.score[self.current_player] += 1 + len(discs)
-        self.score[self.current_player * -1] -= len(discs)
-        self._update_moves()
+        index = self._to_num(xy)
+        player = self.current_player
+        if player == 0 or not self.move_mask(player) >> index & 1:
+            raise KeyError(xy)
+        return self.play(index)
+
+    def play(self, index):
+        player = self.current_player
+        flips = self._get_discs(index, player)
+        undo = (index, flips, player, self.hash, self._masks, self._moves)
+        self.discs[player] |= flips | 1 << index
+        self.discs[player * -1] ^= flips
+        flipped = flips.bit_count()
+        self.score[player] += 1 + flipped
+        self.score[player * -1] -= flipped
+        self._clear_cache()
         self._update_player()
+        self.hash ^= (ZOBRIST[player][index] ^
+                      _mask_key(_FLIP_KEYS, flips) ^
+                      ZOBRIST_SIDE[player] ^
+                      ZOBRIST_SIDE[self.current_player])
+        return undo
 
-    def _add_disc(self, xy):
-        x, y = self._to_num(xy)
-        self._update_possibles(xy)
-        self._gameboard[x][y] = self.current_player
+    def undo_move(self, undo):
+        index, flips, player, key, masks, moves = undo
+        self.discs[player] ^= flips | 1 << index
+        self.discs[player * -1] |= flips
+        flipped = flips.bit_count()
+        self.score[player] -= 1 + flipped
+        self.score[player * -1] += flipped
+        self.current_player = player
+        self.hash = key
+        self._masks = masks
+        self._moves = moves
 
-    def _flip_discs(self, discs):
-        for disc in discs:
-            x, y = self._to_num(disc)
-            self._gameboard[x][y] = self.current_player
+    def copy(self):
+        board = OthelloBoard.__new__(OthelloBoard)
+        board.discs = dict(self.discs)
+        board.score = dict(self.score)
+        board.current_player = self.current_player
+        board.hash = self.hash
+        board._masks = dict(self._masks)
+        board._moves = None
+        return board
 
-    def _on_board(self, x, y):
-        return x >= 0 and x <= 7 and y >= 0 and y <= 7
+    def _add_disc(self, xy):
+        self.discs[self.current_player] |= 1 << self._to_num(xy)
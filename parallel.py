@@ -0,0 +1,113 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from math import inf, nextafter
+from multiprocessing import Value
+
+from othelloboard import OthelloBoard, indices
+
+_shared = None
+_ais = {}
+
+
+def _init_worker(alpha, setter, cancelled, ai_class, options):
+    global _shared
+    _shared = (alpha, setter, cancelled, ai_class, options)
+
+
+def _worker_ai(player):
+    # One engine per colour and process, so each keeps its own table.
+    if player not in _ais:
+        _, _, cancelled, ai_class, options = _shared
+        _ais[player] = ai_class(None, player, 0, **options)
+        # Polled at the engine's clock check, so that cancelling the parent
+        # stops this search too, whatever its deadline.
+        _ais[player]._cancel_flag = cancelled
+    return _ais[player]
+
+
+def _bound(alpha, setter, order):
+    # A move ordered before the one that set alpha must beat it only by a
+    # tie to be preferred, as in the serial search, so it is searched with
+    # alpha lowered just below the shared value.
+    with alpha.get_lock():
+        value, index = alpha.value, setter.value
+    return value if index < order else nextafter(value, -inf)
+
+
+def _publish(alpha, setter, score, order):
+    with alpha.get_lock():
+        if (score > alpha.value or
+                score == alpha.value and order < setter.value):
+            alpha.value = score
+            setter.value = order
+
+
+def _search_root_move(position, move, order, depth, player, deadline):
+    alpha, setter = _shared[:2]
+    ai = _worker_ai(player)
+    board = OthelloBoard.from_discs(*position)
+    board.play(move)
+    bound = _bound(alpha, setter, order)
+    ai._new_search(deadline)
+    score, _ = ai._minimax(board, depth - 1, bound, inf, player)
+    exact = score > bound
+    if exact:
+        _publish(alpha, setter, score, order)
+    return score, exact, ai.nodes
+
+
+class ParallelSearch(object):
+
+    def __init__(self, workers, ai_class, options):
+        self.workers = workers
+        self._alpha = Value('d', -inf)
+        self._setter = Value('i', 0)
+        self._cancelled = Value('b', 0)
+        self._pool = ProcessPoolExecutor(
+            workers, initializer=_init_worker,
+            initargs=(self._alpha, self._setter, self._cancelled, ai_class,
+                      options))
+
+    def shutdown(self):
+        self._pool.shutdown(cancel_futures=True)
+
+    def cancel(self):
+        # Makes the root moves running in the workers give up at their next
+        # clock check, as Ai.cancel does for the parent.
+        self._cancelled.value = 1
+
+    def new_search(self):
+        self._cancelled.value = 0
+
+    def search(self, ai, board, depth, first=None, deadline=inf):
+        # Root split: the first ordered move is searched here with a full
+        # window, the remaining ones in the pool against the shared alpha.
+        player = ai.player
+        moves = ai.ordering.order(ai, board, indices(board.move_mask(player)),
+                                  depth, first, player)
+        undo = board.play(moves[0])
+        try:
+            best_score, _ = ai._minimax(board, depth - 1, -inf, inf, player)
+        finally:
+            board.undo_move(undo)
+        best_order = 0
+        with self._alpha.get_lock():
+            self._alpha.value = best_score
+            self._setter.value = 0
+
+        position = (board.discs[1], board.discs[-1], board.current_player)
+        futures = {self._pool.submit(_search_root_move, position, move,
+                                     order, depth, player, deadline): order
+                   for order, move in enumerate(moves) if order}
+        try:
+            for future in as_completed(futures):
+                score, exact, nodes = future.result()
+                ai.nodes += nodes
+                order = futures[future]
+                if exact and (score > best_score or
+                              score == best_score and order < best_order):
+                    best_score, best_order = score, order
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+        return best_score, moves[best_order]
@@ -0,0 +1,333 @@
+"""Pattern-table evaluation: weights looked up by the contents of fixed
+square patterns, fitted offline from game records.
+
+Each pattern family (edge plus both X squares, 3x3 and 2x5 corners, the
+second to fourth rows and the diagonals of length 4 to 8) is placed on the
+board in all its symmetric positions. All placements of a family share one
+weight table indexed by the base-3 number of its squares (0 empty, 1 own,
+2 opponent), with one set of tables per game phase. A position scores the
+sum of its pattern weights, a bias and a side-to-move term, as the
+predicted final disc difference for the player.
+
+Tables are fitted with a streaming least-squares gradient pipeline over
+game records, chunk by chunk, so memory stays bounded by the table size
+and the chunk size. Fitting needs NumPy; evaluation does not:
+
+    python selfplay.py --games 5000 --opening-plies 8 --output games.jsonl
+    python patterns.py games.jsonl --epochs 8 --output patterns.bin
+
+Game files written by records.py are read as well.
+
+The weights file is a small header followed by float32 weights, read
+through mmap. Ai(..., evaluation='pattern') loads the file named by the
+OTHELLO_PATTERNS environment variable, or patterns.bin next to this
+module.
+"""
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+from time import perf_counter
+
+from othelloboard import OthelloBoard, SQUARES, transpose
+
+_MAGIC = b'OPT1'
+# Magic, number of phases and weights per phase.
+_HEADER = struct.Struct('<4sII')
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            'patterns.bin')
+
+# Positions are split into phases of 5 plies by their disc count.
+PHASES = 12
+# Centidiscs per disc of predicted margin, the scale search works in.
+SCALE = 100
+
+
+def phase(discs):
+    return min(PHASES - 1, (discs - 4) // 5)
+
+
+# Squares of each family as (x, y) in one orientation, in digit order.
+FAMILIES = (
+    ('edge_2x', [(x, 0) for x in range(8)] + [(1, 1), (6, 1)]),
+    ('corner_3x3', [(x, y) for y in range(3) for x in range(3)]),
+    ('corner_2x5', [(x, y) for y in range(2) for x in range(5)]),
+    ('row_2', [(x, 1) for x in range(8)]),
+    ('row_3', [(x, 2) for x in range(8)]),
+    ('row_4', [(x, 3) for x in range(8)]),
+    ('diagonal_8', [(i, i) for i in range(8)]),
+    ('diagonal_7', [(i, i + 1) for i in range(7)]),
+    ('diagonal_6', [(i, i + 2) for i in range(6)]),
+    ('diagonal_5', [(i, i + 3) for i in range(5)]),
+    ('diagonal_4', [(i, i + 4) for i in range(4)]),
+)
+
+# Diagonals and anti-diagonals with at least four squares. With one square
+# per column, multiplying by _GATHER collects them into the top byte.
+_GATHER = 0x0101010101010101
+_DIAGONALS = tuple(
+    sum(1 << (y * 8 + x) for x in range(8) for y in range(8)
+        if (x - y if anti == 0 else x + y - 7) == offset)
+    for anti in (0, 1) for offset in range(-4, 5))
+
+
+def _lines(x):
+    # Bytes of every line of x: rows 0-7, columns 8-15, diagonals 16-33.
+    return (x.to_bytes(8, 'little') + transpose(x).to_bytes(8, 'little') +
+            bytes([(x & mask) * _GATHER >> 56 & 0xFF
+                   for mask in _DIAGONALS]))
+
+
+def _line_of(squares):
+    # Lines covering squares: one diagonal if they lie on one, otherwise
+    # their rows or columns, whichever are fewer.
+    mask = sum(1 << square for square in squares)
+    for i, diagonal in enumerate(_DIAGONALS):
+        if mask & diagonal == mask:
+            return {16 + i: squares}
+    rows, columns = {}, {}
+    for square in squares:
+        rows.setdefault(square // 8, []).append(square)
+        columns.setdefault(8 + square % 8, []).append(square)
+    return rows if len(rows) <= len(columns) else columns
+
+
+def _part(line, squares, digits):
+    # Table mapping a line byte to the base-3 value its discs add to the
+    # pattern index, found by extracting each square on its own.
+    values = [0] * 8
+    for square in squares:
+        bit = _lines(1 << square)[line].bit_length() - 1
+        values[bit] = digits[square]
+    table = [0] * 256
+    for byte in range(1, 256):
+        low = byte & -byte
+        table[byte] = table[byte ^ low] + values[low.bit_length() - 1]
+    return line, tuple(table), tuple(2 * value for value in table)
+
+
+def _symmetries(x, y):
+    for transposed in (0, 1):
+        for my in (0, 1):
+            for mx in (0, 1):
+                tx, ty = (y, x) if transposed else (x, y)
+                yield (7 - tx if mx else tx) + 8 * (7 - ty if my else ty)
+
+
+def _placements():
+    placements = []
+    offset = 0
+    for name, shape in FAMILIES:
+        seen = set()
+        images = list(zip(*[_symmetries(x, y) for x, y in shape]))
+        for squares in images:
+            if frozenset(squares) in seen:
+                continue
+            seen.add(frozenset(squares))
+            digits = {square: 3 ** k for k, square in enumerate(squares)}
+            parts = tuple(_part(line, line_squares, digits) for line,
+                          line_squares in _line_of(squares).items())
+            placements.append((name, offset, parts))
+        offset += 3 ** len(shape)
+    return tuple(placements), offset
+
+
+_PLACEMENTS, _PATTERN_WEIGHTS = _placements()
+# Programs of the evaluation loop: (family offset, parts) per placement.
+_PROGRAM = tuple((offset, parts) for _, offset, parts in _PLACEMENTS)
+# The bias and side-to-move weights follow the pattern tables.
+BIAS = _PATTERN_WEIGHTS
+TO_MOVE = _PATTERN_WEIGHTS + 1
+SIZE = _PATTERN_WEIGHTS + 2
+
+
+def features(own, opp, to_move):
+    # Weight indices within a phase active for own against opp.
+    own_lines = _lines(own)
+    opp_lines = _lines(opp)
+    active = [BIAS, TO_MOVE] if to_move else [BIAS]
+    for index, parts in _PROGRAM:
+        for line, table, opp_table in parts:
+            index += table[own_lines[line]] + opp_table[opp_lines[line]]
+        active.append(index)
+    return active
+
+
+class PatternTables(object):
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, phases, size = _HEADER.unpack_from(self._map)
+        if magic != _MAGIC or phases != PHASES or size != SIZE:
+            self._map.close()
+            raise ValueError('%s is not a weights file for these patterns'
+                             % path)
+        self._weights = memoryview(self._map)[_HEADER.size:].cast('f')
+
+    def close(self):
+        self._weights.release()
+        self._map.close()
+
+    def evaluate(self, board, player):
+        own_count = board.score[player]
+        opp_count = board.score[player * -1]
+        if board.current_player == 0:
+            return 100000 * (own_count - opp_count)
+        own_lines = _lines(board.discs[player])
+        opp_lines = _lines(board.discs[player * -1])
+        weights = self._weights
+        base = phase(own_count + opp_count) * SIZE
+        score = weights[base + BIAS]
+        if board.current_player == player:
+            score += weights[base + TO_MOVE]
+        for index, parts in _PROGRAM:
+            index += base
+            for line, table, opp_table in parts:
+                index += table[own_lines[line]] + opp_table[opp_lines[line]]
+            score += weights[index]
+        return SCALE * score
+
+
+_default = None
+
+
+def evaluate(board, player):
+    # Evaluator for Ai, on the default tables loaded at first use.
+    global _default
+    if _default is None:
+        _default = PatternTables(os.environ.get('OTHELLO_PATTERNS',
+                                                DEFAULT_PATH))
+    return _default.evaluate(board, player)
+
+
+def read_games(path):
+    # Move lists of a game file: a records.py game file, selfplay.py JSONL,
+    # or one game per line written as squares, e.g. 'F5d6C3 d3'.
+    from records import GAME_MAGIC, GameReader
+    with open(path, 'rb') as f:
+        if f.read(len(GAME_MAGIC)) == GAME_MAGIC:
+            f.seek(0)
+            for moves in GameReader(f):
+                yield [SQUARES[move] for move in moves]
+            return
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith('{'):
+                game = json.loads(line)
+                if 'moves' in game:
+                    yield game.get('opening', []) + game['moves']
+            elif line:
+                text = ''.join(line.split())
+                yield [text[i:i + 2] for i in range(0, len(text), 2)]
+
+
+def samples(games):
+    # (phase, active weights, final margin) of every position of every
+    # game from both players' view. Finished positions are scored exactly
+    # and are skipped.
+    for moves in games:
+        board = OthelloBoard()
+        positions = []
+        try:
+            for move in moves:
+                position = (board.discs[1], board.discs[-1],
+                            board.current_player)
+                board.apply_move(move)
+                positions.append(position)
+        except KeyError:
+            continue
+        if board.current_player != 0:
+            continue
+        margin = board.score[1] - board.score[-1]
+        for black, white, player in positions:
+            stage = phase((black | white).bit_count())
+            yield stage, features(black, white, player == 1), margin
+            yield stage, features(white, black, player == -1), -margin
+
+
+def _chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def fit(paths, epochs=8, chunk_size=65536, rate=1.0, smoothing=4.0,
+        report=None):
+    # Least-squares weights of the game files in paths. Every epoch
+    # streams all games again. For each chunk the gradient of the squared
+    # error is averaged per weight over the positions using it and damped
+    # by the number of weights active per position, which keeps the step
+    # stable for rare and common patterns alike. Only the weights, one
+    # gradient and one chunk are held in memory.
+    import numpy as np
+    weights = np.zeros(PHASES * SIZE)
+    for epoch in range(epochs):
+        start = perf_counter()
+        error = count = 0
+        for chunk in _chunks((sample for path in paths
+                              for sample in samples(read_games(path))),
+                             chunk_size):
+            phases = np.fromiter((stage for stage, _, _ in chunk), np.int64,
+                                 len(chunk))
+            targets = np.fromiter((margin for _, _, margin in chunk),
+                                  np.float64, len(chunk))
+            lengths = np.fromiter((len(active) for _, active, _ in chunk),
+                                  np.int64, len(chunk))
+            active = np.fromiter((i for _, indices, _ in chunk
+                                  for i in indices), np.int64, lengths.sum())
+            rows = np.repeat(np.arange(len(chunk)), lengths)
+            active += np.repeat(phases * SIZE, lengths)
+            residual = targets - np.bincount(rows, weights[active],
+                                             len(chunk))
+            gradient = np.bincount(active, residual[rows], weights.size)
+            uses = np.bincount(active, minlength=weights.size)
+            weights += (rate / lengths.mean()) * gradient / (uses + smoothing)
+            error += float(residual @ residual)
+            count += len(chunk)
+        if report is not None:
+            report({'epoch': epoch + 1, 'positions': count,
+                    'rmse': (error / max(1, count)) ** 0.5,
+                    'seconds': perf_counter() - start})
+    return weights
+
+
+def write(path, weights):
+    import numpy as np
+    with open(path, 'wb') as f:
+        f.write(_HEADER.pack(_MAGIC, PHASES, SIZE))
+        f.write(np.asarray(weights, dtype='<f4').tobytes())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Fit pattern weights from game records.')
+    parser.add_argument('games', nargs='+',
+                        help='selfplay.py JSONL or one game of squares '
+                        'per line')
+    parser.add_argument('--epochs', type=int, default=8)
+    parser.add_argument('--chunk', type=int, default=65536,
+                        help='positions per gradient step')
+    parser.add_argument('--rate', type=float, default=1.0)
+    parser.add_argument('--output', default='patterns.bin')
+    args = parser.parse_args(argv)
+
+    def report(progress):
+        sys.stderr.write(json.dumps(progress) + '\n')
+    weights = fit(args.games, args.epochs, args.chunk, args.rate,
+                  report=report)
+    write(args.output, weights)
+    print('%d weights written to %s' % (weights.size, args.output))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+import threading
+
+
+class BackgroundSearch(object):
+    # Runs one search of ai in a daemon thread, so the caller (the Tk event
+    # loop) never waits for it; result holds the return value once the
+    # thread is done. stop cancels the search and returns once the thread
+    # has let go of the Ai, which takes at most a few clock checks.
+
+    def __init__(self, ai):
+        self.ai = ai
+        self.result = None
+        self._thread = None
+
+    @property
+    def active(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, function, *args):
+        self.stop()
+        self._launch(function, *args)
+
+    def _launch(self, function, *args):
+        self.result = None
+        self._thread = threading.Thread(target=self._run,
+                                        args=(function,) + args, daemon=True)
+        self._thread.start()
+
+    def _run(self, function, *args):
+        self.result = function(*args)
+
+    def stop(self):
+        if self._thread is None:
+            return
+        # A search started just before the first cancel resets the
+        # deadline, so cancel until the thread returns.
+        while self._thread.is_alive():
+            self.ai.cancel()
+            self._thread.join(0.01)
+        self._thread = None
+
+
+class Ponderer(BackgroundSearch):
+    # Runs Ai.ponder while the opponent is to move.
+
+    def __init__(self, ai, replies=4):
+        super().__init__(ai)
+        self.replies = replies
+        self._stop = None
+
+    def start(self, board):
+        self.stop()
+        self._stop = threading.Event()
+        self._launch(self.ai.ponder, board.copy(), self._stop, self.replies)
+
+    def stop(self):
+        if self._stop is not None:
+            self._stop.set()
+        super().stop()
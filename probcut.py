@@ -0,0 +1,293 @@
+"""Selective search by Multi-ProbCut, calibrated from the engine's own
+searches.
+
+Before a node is searched to depth d, shallow searches to the depths of
+checks(d) predict its value: a deep value v is modelled as a * v_s + b plus
+normally distributed noise of deviation sigma, with a, b and sigma fitted
+per game phase, depth pair and point of view. If a shallow search shows
+v >= beta + t * sigma (or v <= alpha - t * sigma) the node is cut without
+the deep search. t is the selectivity: larger is safer and slower.
+
+The parameters are fitted offline by searching batches of positions to
+every depth with the plain search:
+
+    python probcut.py --positions 400 --max-depth 6 --output probcut.json
+    python probcut.py games.bin --positions 2000 --workers 8
+
+Positions come from random playouts, or from position and game files read
+by records.py and patterns.py. Ai(..., selectivity=1.5) loads the file
+named by the OTHELLO_PROBCUT environment variable, or probcut.json next to
+this module.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from math import inf, nextafter
+from time import perf_counter
+
+from othelloboard import OthelloBoard
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            'probcut.json')
+
+# Positions are split into phases of 15 plies by their disc count.
+PHASES = 4
+# Fewer samples than this leave a depth pair uncalibrated, and unused.
+MIN_SAMPLES = 20
+
+
+def phase(discs):
+    return min(PHASES - 1, (discs - 4) // 15)
+
+
+def checks(depth):
+    # Shallow depths tried, shallowest first, before a search to depth.
+    # They differ from it by an even number of plies, so shallow and deep
+    # values are from the same side's horizon.
+    shallow = depth // 2
+    shallow -= (depth - shallow) % 2
+    return tuple(s for s in (shallow, shallow + 2) if 1 <= s <= depth - 2)
+
+
+class ProbCut(object):
+    # Cut tests for Ai._minimax over a table of fitted parameters,
+    # {(phase, depth, own): ((shallow, a, b, sigma), ...)} where own tells
+    # whether the searching player is the one to move.
+
+    def __init__(self, table, selectivity=1.5):
+        self.table = table
+        self.selectivity = selectivity
+        self.min_depth = min((key[1] for key in table), default=inf)
+        self.tries = 0
+        self.cuts = 0
+
+    def cut(self, ai, board, depth, alpha, beta, player):
+        # A fail-soft bound predicted from the shallow search if the node
+        # can be cut, otherwise None.
+        tests = self.table.get((phase(board.score[1] + board.score[-1]),
+                                depth, board.current_player == player))
+        if tests is None:
+            return None
+        self.tries += 1
+        for shallow, a, b, sigma in tests:
+            margin = self.selectivity * sigma
+            if beta < inf:
+                bound = (beta + margin - b) / a
+                value = ai._minimax(board, shallow, nextafter(bound, -inf),
+                                    bound, player)[0]
+                if value >= bound:
+                    self.cuts += 1
+                    return max(beta, a * value + b - margin)
+            if alpha > -inf:
+                bound = (alpha - margin - b) / a
+                value = ai._minimax(board, shallow, bound,
+                                    nextafter(bound, inf), player)[0]
+                if value <= bound:
+                    self.cuts += 1
+                    return min(alpha, a * value + b + margin)
+        return None
+
+
+def load(path):
+    with open(path) as f:
+        data = json.load(f)
+    table = {}
+    for pair in data['pairs']:
+        key = (pair['phase'], pair['depth'], pair['own'])
+        table.setdefault(key, []).append(
+            (pair['shallow'], pair['a'], pair['b'], pair['sigma']))
+    return {key: tuple(sorted(tests)) for key, tests in table.items()}
+
+
+_default = None
+
+
+def default_table():
+    # The table of OTHELLO_PROBCUT or probcut.json, loaded at first use.
+    global _default
+    if _default is None:
+        _default = load(os.environ.get('OTHELLO_PROBCUT', DEFAULT_PATH))
+    return _default
+
+
+def read_positions(path, min_empties):
+    # Positions of a records.py position file, or of every game of a game
+    # file read by patterns.read_games.
+    from patterns import read_games
+    from records import POSITION_MAGIC, PositionReader
+    with open(path, 'rb') as f:
+        if f.read(len(POSITION_MAGIC)) == POSITION_MAGIC:
+            f.seek(0)
+            for board in PositionReader(f):
+                if 64 - board.score[1] - board.score[-1] > min_empties:
+                    yield board
+            return
+    for moves in read_games(path):
+        board = OthelloBoard()
+        for move in moves:
+            if board.current_player == 0:
+                break
+            if 64 - board.score[1] - board.score[-1] > min_empties:
+                yield board
+            board = board.copy()
+            try:
+                board.apply_move(move)
+            except KeyError:
+                break
+
+
+def sample_positions(boards, count, seed=0):
+    # count boards drawn uniformly from an iterable of any length, holding
+    # only the sample in memory (reservoir sampling).
+    rng = random.Random(seed)
+    sample = []
+    for seen, board in enumerate(boards):
+        if seen < count:
+            sample.append(board)
+        else:
+            slot = rng.randrange(seen + 1)
+            if slot < count:
+                sample[slot] = board
+    return sample
+
+
+def random_positions(count, min_empties, seed=0):
+    # Positions of seeded random playouts by selfplay.random_opening,
+    # spread over the game.
+    from selfplay import random_opening
+    rng = random.Random(seed)
+    boards = []
+    while len(boards) < count:
+        board = OthelloBoard()
+        for move in random_opening(rng.randrange(60 - min_empties),
+                                   rng.getrandbits(32)):
+            board.apply_move(move)
+        if (board.current_player != 0 and
+                64 - board.score[1] - board.score[-1] > min_empties):
+            boards.append(board)
+    return boards
+
+
+def _calibrate_batch(positions, max_depth, options):
+    # Sums for the regression of every depth pair over one batch: n and the
+    # sums of x, y, xx, xy and yy, keyed like ProbCut.table by shallow too.
+    from ai import Ai
+    sums = {}
+    for position in positions:
+        board = OthelloBoard.from_bytes(position)
+        stage = phase(board.score[1] + board.score[-1])
+        for player in (board.current_player, -board.current_player):
+            # Deepening on one table gives fixed-depth values: entries
+            # are only used by searches no deeper than they are.
+            ai = Ai(None, player, 0, **options)
+            ai._new_search()
+            values = [None]
+            for depth in range(1, max_depth + 1):
+                values.append(ai._minimax(board.copy(), depth, -inf, inf,
+                                          player)[0])
+            for depth in range(3, max_depth + 1):
+                y = values[depth]
+                for shallow in checks(depth):
+                    x = values[shallow]
+                    key = (stage, depth, player == board.current_player,
+                           shallow)
+                    total = sums.setdefault(key, [0, 0.0, 0.0, 0.0, 0.0,
+                                                  0.0])
+                    for i, value in enumerate((1, x, y, x * x, x * y,
+                                               y * y)):
+                        total[i] += value
+    return sums
+
+
+def _fit(sums):
+    pairs = []
+    for (stage, depth, own, shallow), (n, x, y, xx, xy, yy) in sorted(
+            sums.items()):
+        if n < MIN_SAMPLES:
+            continue
+        variance = xx - x * x / n
+        if variance <= 0:
+            continue
+        a = (xy - x * y / n) / variance
+        if a <= 0:
+            continue
+        b = (y - a * x) / n
+        residual = (yy - 2 * a * xy - 2 * b * y + a * a * xx +
+                    2 * a * b * x + b * b * n)
+        pairs.append({'phase': stage, 'depth': depth, 'own': own,
+                      'shallow': shallow, 'a': a, 'b': b,
+                      'sigma': max(0.0, residual / (n - 2)) ** 0.5,
+                      'samples': n})
+    return pairs
+
+
+def calibrate(boards, max_depth=6, batch_size=8, workers=1, options=None,
+              report=None):
+    # Fitted ProbCut parameters of boards, searched to max_depth. Boards
+    # are searched in batches in a process pool; each batch returns only
+    # the sums of its regressions, so memory does not grow with the number
+    # of positions.
+    positions = [board.to_bytes() for board in boards]
+    batches = [positions[i:i + batch_size]
+               for i in range(0, len(positions), batch_size)]
+    sums = {}
+    done = 0
+    start = perf_counter()
+    with ProcessPoolExecutor(workers) as pool:
+        for batch, result in zip(batches, pool.map(
+                _calibrate_batch, batches, [max_depth] * len(batches),
+                [options or {}] * len(batches))):
+            for key, values in result.items():
+                total = sums.setdefault(key, [0] * 6)
+                for i, value in enumerate(values):
+                    total[i] += value
+            done += len(batch)
+            if report is not None:
+                report({'positions': done,
+                        'seconds': perf_counter() - start})
+    return {'max_depth': max_depth, 'positions': len(positions),
+            'pairs': _fit(sums)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Fit ProbCut parameters from searches of positions.')
+    parser.add_argument('sources', nargs='*',
+                        help='position or game files (default: random '
+                        'playouts)')
+    parser.add_argument('--positions', type=int, default=400,
+                        help='positions sampled from the sources')
+    parser.add_argument('--max-depth', type=int, default=6)
+    parser.add_argument('--min-empties', type=int, default=12,
+                        help='skip positions the endgame solver takes')
+    parser.add_argument('--batch', type=int, default=8,
+                        help='positions per worker task')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='worker processes (default: all cores)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='probcut.json')
+    args = parser.parse_args(argv)
+    if args.sources:
+        boards = sample_positions(
+            (board for path in args.sources
+             for board in read_positions(path, args.min_empties)),
+            args.positions, args.seed)
+    else:
+        boards = random_positions(args.positions, args.min_empties,
+                                  args.seed)
+
+    def report(progress):
+        sys.stderr.write(json.dumps(progress) + '\n')
+    result = calibrate(boards, args.max_depth, args.batch, args.workers,
+                       report=report)
+    with open(args.output, 'w') as f:
+        json.dump(result, f, indent=1)
+    print('%d depth pairs fitted on %d positions written to %s'
+          % (len(result['pairs']), result['positions'], args.output))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,238 @@
+"""Compact binary files of positions and game records.
+
+A position file holds 17-byte records: the black and white bitboards as
+little-endian 64-bit integers and the side to move as a signed byte (1, -1
+or 0 once the game is over). A game file holds one record per game: the
+number of moves as a byte followed by one byte per move, the index of its
+square; passes are implied. Both files start with a 4-byte magic.
+
+Readers and writers stream records through a fixed-size buffer, so
+memory use does not grow with the file. The command line converts
+selfplay.py JSONL to game files, extracts positions and removes
+duplicates up to symmetry:
+
+    python records.py convert games.jsonl games.bin
+    python records.py positions games.bin positions.bin
+    python records.py dedupe positions.bin unique.bin
+"""
+import argparse
+import json
+
+from othelloboard import (OthelloBoard, POSITION, SQUARES, normalise,
+                          transform)
+
+POSITION_MAGIC = b'OPO1'
+GAME_MAGIC = b'OGA1'
+
+# Symmetries that leave the start position, and so every game, in place.
+_START = OthelloBoard().discs
+_GAME_SYMMETRIES = tuple(
+    symmetry for symmetry in range(8)
+    if transform(symmetry, _START[1]) == _START[1] and
+    transform(symmetry, _START[-1]) == _START[-1])
+# Translation tables of move bytes under each of them.
+_GAME_MAPS = tuple(bytes(transform(symmetry, 1 << i).bit_length() - 1
+                         for i in range(64)) + bytes(192)
+                   for symmetry in _GAME_SYMMETRIES)
+
+
+def _check_magic(f, magic):
+    if f.read(len(magic)) != magic:
+        raise ValueError('%s does not start with %r'
+                         % (getattr(f, 'name', 'file'), magic))
+
+
+class PositionWriter(object):
+
+    def __init__(self, f, buffer_records=4096):
+        self.f = f
+        self.count = 0
+        self._buffer = []
+        self._buffer_records = buffer_records
+        f.write(POSITION_MAGIC)
+
+    def write(self, board):
+        self.write_bytes(board.to_bytes())
+
+    def write_bytes(self, record):
+        self._buffer.append(record)
+        self.count += 1
+        if len(self._buffer) >= self._buffer_records:
+            self.flush()
+
+    def flush(self):
+        self.f.write(b''.join(self._buffer))
+        self._buffer = []
+
+    def close(self):
+        self.flush()
+
+
+class PositionReader(object):
+    # Iterates over the boards of a position file; records() yields the raw
+    # 17-byte records instead.
+
+    def __init__(self, f, buffer_records=4096):
+        self.f = f
+        self._chunk = buffer_records * POSITION.size
+        _check_magic(f, POSITION_MAGIC)
+
+    def records(self):
+        while True:
+            chunk = self.f.read(self._chunk)
+            if len(chunk) % POSITION.size:
+                raise ValueError('truncated position record')
+            for offset in range(0, len(chunk), POSITION.size):
+                yield chunk[offset:offset + POSITION.size]
+            if len(chunk) < self._chunk:
+                return
+
+    def __iter__(self):
+        for record in self.records():
+            yield OthelloBoard.from_bytes(record)
+
+
+class GameWriter(object):
+
+    def __init__(self, f, buffer_bytes=1 << 16):
+        self.f = f
+        self.count = 0
+        self._buffer = bytearray()
+        self._buffer_bytes = buffer_bytes
+        f.write(GAME_MAGIC)
+
+    def write(self, moves):
+        # moves as square indices or names such as 'F5'.
+        moves = bytes(SQUARES.index(move.upper())
+                      if isinstance(move, str) else move for move in moves)
+        self.write_bytes(moves)
+
+    def write_bytes(self, moves):
+        if len(moves) > 60:
+            raise ValueError('a game has at most 60 moves')
+        self._buffer.append(len(moves))
+        self._buffer += moves
+        self.count += 1
+        if len(self._buffer) >= self._buffer_bytes:
+            self.flush()
+
+    def flush(self):
+        self.f.write(self._buffer)
+        self._buffer = bytearray()
+
+    def close(self):
+        self.flush()
+
+
+class GameReader(object):
+    # Iterates over the games of a game file as bytes of move indices.
+
+    def __init__(self, f, buffer_bytes=1 << 16):
+        self.f = f
+        self._buffer_bytes = buffer_bytes
+        _check_magic(f, GAME_MAGIC)
+
+    def __iter__(self):
+        data = b''
+        offset = 0
+        while True:
+            if offset < len(data) and offset + data[offset] < len(data):
+                end = offset + 1 + data[offset]
+                yield data[offset + 1:end]
+                offset = end
+                continue
+            chunk = self.f.read(self._buffer_bytes)
+            if not chunk:
+                if offset < len(data):
+                    raise ValueError('truncated game record')
+                return
+            data = data[offset:] + chunk
+            offset = 0
+
+
+def replay(moves):
+    # The board before every move of a game and the final board.
+    board = OthelloBoard()
+    for move in moves:
+        yield board
+        board = board.copy()
+        board.apply_move(SQUARES[move])
+    yield board
+
+
+def canonical_position(record):
+    black, white, player = POSITION.unpack(record)
+    (black, white), _ = normalise(black, white)
+    return POSITION.pack(black, white, player)
+
+
+def canonical_game(moves):
+    return min(moves.translate(square_map) for square_map in _GAME_MAPS)
+
+
+def convert(source, output):
+    # selfplay.py JSONL to a game file.
+    with open(source) as f, open(output, 'wb') as out:
+        writer = GameWriter(out)
+        for line in f:
+            game = json.loads(line)
+            if 'moves' in game:
+                writer.write(game.get('opening', []) + game['moves'])
+        writer.close()
+    return writer.count
+
+
+def positions(source, output):
+    with open(source, 'rb') as f, open(output, 'wb') as out:
+        writer = PositionWriter(out)
+        for moves in GameReader(f):
+            for board in replay(moves):
+                writer.write(board)
+        writer.close()
+    return writer.count
+
+
+def dedupe(source, output):
+    # Keeps the first of every set of positions or games that are equal up
+    # to symmetry. Only the canonical forms seen so far are held in memory.
+    with open(source, 'rb') as f, open(output, 'wb') as out:
+        magic = f.read(4)
+        f.seek(0)
+        if magic == GAME_MAGIC:
+            reader, writer = iter(GameReader(f)), GameWriter(out)
+            canonical = canonical_game
+        else:
+            reader, writer = PositionReader(f).records(), PositionWriter(out)
+            canonical = canonical_position
+        seen = set()
+        total = 0
+        for record in reader:
+            total += 1
+            key = canonical(record)
+            if key not in seen:
+                seen.add(key)
+                writer.write_bytes(record)
+        writer.close()
+    return total, writer.count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Convert, extract and dedupe position and game files.')
+    parser.add_argument('command', choices=('convert', 'positions', 'dedupe'))
+    parser.add_argument('source')
+    parser.add_argument('output')
+    args = parser.parse_args(argv)
+    if args.command == 'convert':
+        print('%d games written to %s' % (convert(args.source, args.output),
+                                          args.output))
+    elif args.command == 'positions':
+        print('%d positions written to %s'
+              % (positions(args.source, args.output), args.output))
+    else:
+        total, kept = dedupe(args.source, args.output)
+        print('%d of %d records kept in %s' % (kept, total, args.output))
+
+
+if __name__ == '__main__':
+    main()
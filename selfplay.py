@@ -0,0 +1,164 @@
+"""Headless self-play between two engine settings.
+
+Plays games between engines A and B in a process pool and writes one JSON
+line per finished game, followed by a summary line with A's wins, draws,
+losses and the throughput. Engines are given as comma separated
+key=value settings:
+
+    depth=N            fixed-depth search (Ai.best_move)
+    time=SECONDS       time-limited search (Ai.time_limit_move)
+    eval=NAME          evaluator from evaluation.EVALUATORS
+    ordering=NAME      move ordering from ordering.ORDERINGS
+    algorithm=NAME     search algorithm from algorithms.ALGORITHMS
+    table_mb=MB        transposition table size
+    endgame_empties=N  empties at which the endgame solver takes over
+    book=PATH          opening book built with book.py
+    selectivity=T      ProbCut selectivity, see probcut.py
+
+Example:
+
+    python selfplay.py --games 200 --a depth=3 --b time=0.1 --workers 8
+"""
+import argparse
+import json
+import random
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from time import perf_counter
+
+from ai import Ai
+from book import OpeningBook
+from othelloboard import OthelloBoard
+
+_OPTIONS = {'depth': int, 'time': float, 'eval': str, 'table_mb': float,
+            'endgame_empties': int, 'book': str, 'ordering': str,
+            'algorithm': str, 'selectivity': float}
+
+
+def parse_engine(text):
+    engine = {}
+    for item in text.split(','):
+        key, _, value = item.partition('=')
+        key = key.strip()
+        if key not in _OPTIONS:
+            raise ValueError('unknown engine setting %r' % key)
+        engine[key] = _OPTIONS[key](value)
+    if 'depth' not in engine and 'time' not in engine:
+        engine['depth'] = 3
+    return engine
+
+
+_books = {}
+
+
+def _open_book(path):
+    # Books are mapped once per process and shared by all its games.
+    if path not in _books:
+        _books[path] = OpeningBook(path)
+    return _books[path]
+
+
+def make_ai(board, player, engine):
+    options = {}
+    if 'eval' in engine:
+        options['evaluation'] = engine['eval']
+    for key in ('table_mb', 'endgame_empties', 'ordering', 'algorithm',
+                'selectivity'):
+        if key in engine:
+            options[key] = engine[key]
+    if 'book' in engine:
+        options['book'] = _open_book(engine['book'])
+    return Ai(board, player, engine.get('time', 0), **options)
+
+
+def random_opening(plies, seed):
+    rng = random.Random(seed)
+    board = OthelloBoard()
+    opening = []
+    while len(opening) < plies and board.current_player != 0:
+        move = rng.choice(sorted(board.moves[board.current_player]))
+        board.apply_move(move)
+        opening.append(move)
+    return opening
+
+
+def play_game(a, b, a_color, opening):
+    board = OthelloBoard()
+    for move in opening:
+        board.apply_move(move)
+    ais = {a_color: make_ai(board, a_color, a),
+           -a_color: make_ai(board, -a_color, b)}
+    moves = []
+    start = perf_counter()
+    while board.current_player != 0:
+        ai = ais[board.current_player]
+        engine = a if ai is ais[a_color] else b
+        if 'time' in engine:
+            move = ai.time_limit_move()
+        else:
+            move = ai.best_move(engine['depth'])
+        board.apply_move(move)
+        moves.append(move)
+    margin = board.score[a_color] - board.score[-a_color]
+    return {'a_color': 'black' if a_color == 1 else 'white',
+            'opening': opening, 'moves': moves,
+            'black': board.score[1], 'white': board.score[-1],
+            'margin': margin,
+            'result': 'win' if margin > 0 else 'loss' if margin < 0
+            else 'draw',
+            'seconds': perf_counter() - start}
+
+
+def _play(game, a, b, opening_plies, seed):
+    # Each opening is played twice with colours swapped.
+    opening = random_opening(opening_plies, seed + game // 2)
+    a_color = 1 if game % 2 == 0 else -1
+    result = play_game(a, b, a_color, opening)
+    result['game'] = game
+    return result
+
+
+def run(a, b, games, workers=1, opening_plies=4, seed=0):
+    # Yields game results as they finish and a summary as the last item.
+    summary = {'games': 0, 'win': 0, 'draw': 0, 'loss': 0, 'margin': 0}
+    start = perf_counter()
+    with ProcessPoolExecutor(workers) as pool:
+        futures = [pool.submit(_play, game, a, b, opening_plies, seed)
+                   for game in range(games)]
+        for future in as_completed(futures):
+            result = future.result()
+            summary['games'] += 1
+            summary[result['result']] += 1
+            summary['margin'] += result['margin']
+            yield result
+    elapsed = perf_counter() - start
+    summary['seconds'] = elapsed
+    summary['games_per_sec'] = summary['games'] / elapsed
+    summary['a'] = a
+    summary['b'] = b
+    yield {'summary': summary}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Headless Ai self-play.')
+    parser.add_argument('--a', type=parse_engine, default='depth=3',
+                        help='settings of engine A')
+    parser.add_argument('--b', type=parse_engine, default='depth=3',
+                        help='settings of engine B')
+    parser.add_argument('--games', type=int, default=100)
+    parser.add_argument('--workers', type=int, default=None,
+                        help='worker processes (default: all cores)')
+    parser.add_argument('--opening-plies', type=int, default=4,
+                        help='random plies played before the engines')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', type=argparse.FileType('w'),
+                        default=sys.stdout, help='JSONL output file')
+    args = parser.parse_args(argv)
+    for result in run(args.a, args.b, args.games, args.workers,
+                      args.opening_plies, args.seed):
+        args.output.write(json.dumps(result) + '\n')
+        args.output.flush()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,474 @@
+"""Engine server speaking the NBoard protocol on stdin/stdout or over TCP.
+
+    python server.py                        one session on stdin/stdout
+    python server.py --tcp 127.0.0.1:7777   one session per connection
+
+Searches run in a pool of worker processes. A worker keeps the Ai of the
+sessions it served, transposition table included, and a session goes back
+to the worker that served it last whenever that worker is free, so its
+searches start from a warm cache. At most workers + --queue searches are
+admitted; a session wanting another stops being read until one finishes,
+which pushes back on the client through its pipe or socket.
+
+Commands, those of NBoard protocol 2 plus set time, stop and quit:
+
+    nboard 2              replies set myname OthelloBot
+    set depth N           search to depth N from now on
+    set time SECONDS      search for SECONDS from now on, 0 by depth
+    set game GGF          position of a GGF game record
+    move F5[/EVAL/TIME]   play a move, PA passes
+    go                    replies === F5/EVAL/SECONDS
+    hint N                replies search PV EVAL 0 DEPTH for each of the
+                          N best moves, best first, then status; N >= 1
+    stop                  cancel the running search
+    ping N                replies pong N once earlier commands are done
+    quit
+
+set game, move and stop cancel a running search; go and hint wait for it.
+Whichever of set depth and set time came last decides how to search, so
+NBoard's set depth sets the engine's strength as it expects.
+
+EVAL is for the side to move. It is the exact final disc difference when
+the endgame solver finished or the search line ends the game, where
+scores are 100000 per disc; otherwise it is the evaluation divided by
+100, a heuristic in evaluation units rather than a disc count.
+"""
+import argparse
+import asyncio
+import itertools
+import queue
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+from multiprocessing import Pipe, Process
+
+from ai import Ai
+from othelloboard import OthelloBoard, move_mask
+
+NAME = 'OthelloBot'
+
+
+def _worker(conn, options, sessions):
+    # Searches run on the main thread while a listener thread takes in the
+    # next requests and cancels the running search when asked to.
+    ais = OrderedDict()
+    requests = queue.Queue()
+    running = {'job': None, 'ai': None}
+    cancelled = set()
+
+    def listen():
+        while True:
+            try:
+                message = conn.recv()
+            except EOFError:
+                message = ('close',)
+            if message[0] == 'close':
+                requests.put(None)
+                return
+            if message[0] == 'cancel':
+                cancelled.add(message[1])
+                # As in ponder.BackgroundSearch, cancel until the search
+                # gives up, since starting it resets the deadline.
+                while running['job'] == message[1]:
+                    running['ai'].cancel()
+                    time.sleep(0.005)
+            else:
+                requests.put(message)
+
+    threading.Thread(target=listen, daemon=True).start()
+    while True:
+        message = requests.get()
+        if message is None:
+            return
+        if message[0] == 'drop':
+            for key in [key for key in ais if key[0] == message[1]]:
+                del ais[key]
+            continue
+        _, job, session, position, time_limit, depth, lines = message
+        board = OthelloBoard.from_bytes(position)
+        # One Ai per colour, as scores are from the Ai's player's view.
+        key = (session, board.current_player)
+        ai = ais.pop(key, None)
+        if ai is None:
+            ai = Ai(None, board.current_player, 0, **options)
+        ais[key] = ai
+        while len(ais) > 2 * sessions:
+            ais.popitem(last=False)
+        ai.board = board
+        ai.time_limit = time_limit
+        running['ai'] = ai
+        running['job'] = job
+        result = {'job': job}
+        try:
+            if job in cancelled:
+                result['cancelled'] = True
+            elif lines:
+                result['lines'] = ai.multi_pv(lines,
+                                              None if time_limit else depth)
+                result['move'] = (result['lines'][0]['move']
+                                  if result['lines'] else None)
+            elif time_limit:
+                result['move'] = ai.time_limit_move()
+            else:
+                result['move'] = ai.best_move(depth)
+        except Exception as error:
+            result['error'] = repr(error)
+        running['job'] = None
+        if job in cancelled:
+            result['cancelled'] = True
+        cancelled.difference_update([c for c in list(cancelled) if c <= job])
+        if 'move' in result:
+            result.update(score=ai.stats.score, source=ai.stats.source,
+                          depth=ai.stats.depth, nodes=ai.stats.nodes,
+                          seconds=ai.stats.seconds)
+        conn.send(result)
+
+
+class _Worker(object):
+
+    def __init__(self, conn, process):
+        self.conn = conn
+        self.process = process
+        self.busy = False
+
+
+class EnginePool(object):
+    # Worker processes with session affinity; see the module docstring.
+
+    # Seconds a search may overrun its time limit before it is cancelled.
+    grace = 2.0
+
+    def __init__(self, workers=2, queue=4, sessions_per_worker=4, **options):
+        self.workers = []
+        self.slots = asyncio.Semaphore(workers + queue)
+        self._size = workers
+        self._options = options
+        self._sessions = sessions_per_worker
+        self._home = {}
+        self._futures = {}
+        self._jobs = itertools.count()
+        self._changed = asyncio.Condition()
+
+    def start(self):
+        loop = asyncio.get_running_loop()
+        for _ in range(self._size):
+            conn, child = Pipe()
+            process = Process(target=_worker, daemon=True,
+                              args=(child, self._options, self._sessions))
+            process.start()
+            child.close()
+            worker = _Worker(conn, process)
+            loop.add_reader(conn.fileno(), self._receive, worker)
+            self.workers.append(worker)
+
+    def close(self):
+        loop = asyncio.get_running_loop()
+        for worker in self.workers:
+            loop.remove_reader(worker.conn.fileno())
+            worker.conn.send(('close',))
+            worker.process.join()
+            worker.conn.close()
+        self.workers = []
+        self._home.clear()
+
+    def _receive(self, worker):
+        result = worker.conn.recv()
+        future = self._futures.pop(result['job'], None)
+        if future is not None and not future.done():
+            future.set_result(result)
+
+    async def _acquire(self, session):
+        # The session's last worker if it is free, else the free worker
+        # serving the fewest sessions; waits while all are busy.
+        async with self._changed:
+            while True:
+                worker = self._home.get(session)
+                if worker is None or worker.busy:
+                    idle = [w for w in self.workers if not w.busy]
+                    worker = min(idle, key=self._load, default=None)
+                if worker is not None:
+                    break
+                await self._changed.wait()
+            worker.busy = True
+            self._home[session] = worker
+            return worker
+
+    def _load(self, worker):
+        return sum(home is worker for home in self._home.values())
+
+    async def _release(self, worker):
+        async with self._changed:
+            worker.busy = False
+            self._changed.notify_all()
+
+    async def search(self, session, board, time_limit=0, depth=5, lines=0):
+        # A result dict with the move, score, source, depth, nodes and
+        # seconds, or cancelled/error. With lines, the lines best moves
+        # are analysed by Ai.multi_pv and listed under 'lines'. Cancelling
+        # the calling task cancels the search.
+        worker = await self._acquire(session)
+        job = next(self._jobs)
+        future = asyncio.get_running_loop().create_future()
+        self._futures[job] = future
+        worker.conn.send(('search', job, session, board.to_bytes(),
+                          time_limit, depth, lines))
+        timeout = time_limit + self.grace if time_limit else None
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            # An overrunning search answers with its best move so far.
+            worker.conn.send(('cancel', job))
+            return await future
+        except asyncio.CancelledError:
+            # The worker stays busy until the search has given up.
+            worker.conn.send(('cancel', job))
+            await future
+            raise
+        finally:
+            await self._release(worker)
+
+    def drop(self, session):
+        worker = self._home.pop(session, None)
+        if worker is not None:
+            worker.conn.send(('drop', session))
+
+
+def parse_ggf(text):
+    # Board after the moves of a GGF game record. Passes are implied by
+    # the board and skipped.
+    match = re.search(r'BO\[8\s+([-*O]{64})\s*([*O])\]', text)
+    if match is None:
+        board = OthelloBoard()
+    else:
+        squares, side = match.groups()
+        black = sum(1 << i for i, c in enumerate(squares) if c == '*')
+        white = sum(1 << i for i, c in enumerate(squares) if c == 'O')
+        player = 1 if side == '*' else -1
+        board = OthelloBoard.from_discs(black, white,
+                                        _to_move(black, white, player))
+    # Only move properties: PB[...] and PW[...] name the players.
+    for move in re.findall(r'(?<![A-Z])[BW]\[([^\]/]*)', text):
+        play(board, move)
+    return board
+
+
+def _to_move(black, white, player):
+    discs = {1: black, -1: white}
+    if move_mask(discs[player], discs[-player]):
+        return player
+    if move_mask(discs[-player], discs[player]):
+        return -player
+    return 0
+
+
+def to_ggf(board):
+    squares = ''.join('*' if board.discs[1] >> i & 1 else
+                      'O' if board.discs[-1] >> i & 1 else '-'
+                      for i in range(64))
+    side = 'O' if board.current_player == -1 else '*'
+    return '(;GM[Othello]PC[%s]TY[8]BO[8 %s %s];)' % (NAME, squares, side)
+
+
+def play(board, move):
+    move = move.split('/')[0].strip().upper()
+    if move not in ('PA', 'PASS', ''):
+        board.apply_move(move)
+
+
+def _search_eval(score):
+    # Search scores of at least 100000 come from finished games, 100000
+    # per disc; the others are evaluations, sent divided by 100.
+    if abs(score) >= 100000:
+        return float(round(score / 100000))
+    return round(score / 100, 2)
+
+
+def _eval(result):
+    if result['score'] is None:
+        return 0.0
+    if result['source'] == 'solver':
+        return float(result['score'])
+    return _search_eval(result['score'])
+
+
+class Session(object):
+    # One client: its game, settings and at most one running search.
+
+    _ids = itertools.count()
+
+    def __init__(self, pool, write, time_limit=1.0, depth=5):
+        self.pool = pool
+        self.write = write
+        self.id = next(self._ids)
+        self.board = OthelloBoard()
+        self.time_limit = time_limit
+        self.depth = depth
+        self._task = None
+
+    async def run(self, readline):
+        try:
+            while True:
+                line = await readline()
+                if not line:
+                    break
+                line = line.decode().strip()
+                if line and not await self.handle(line):
+                    break
+        finally:
+            await self.stop()
+            self.pool.drop(self.id)
+
+    async def _finish(self):
+        if self._task is not None:
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def handle(self, line):
+        # Handles one command; False once the client quits.
+        command, _, rest = line.partition(' ')
+        try:
+            if command == 'nboard':
+                await self.write('set myname ' + NAME)
+            elif command == 'set':
+                await self._set(*rest.partition(' ')[::2])
+            elif command == 'move':
+                await self.stop()
+                play(self.board, rest)
+            elif command == 'go':
+                await self._start(0)
+            elif command == 'hint':
+                count = int(rest or 1)
+                if count < 1:
+                    raise ValueError('at least one line')
+                await self._start(count)
+            elif command == 'ping':
+                await self._finish()
+                await self.write('pong ' + rest)
+            elif command == 'stop':
+                await self.stop()
+            elif command == 'quit':
+                return False
+            elif command not in ('learn', 'analyze'):
+                await self.write('status unknown command ' + command)
+        except (KeyError, ValueError) as error:
+            await self.write('status error %s: %s' % (line, error))
+        return True
+
+    async def _set(self, name, value):
+        if name == 'depth':
+            self.depth = int(value)
+            self.time_limit = 0
+        elif name == 'time':
+            self.time_limit = float(value)
+        elif name == 'game':
+            await self.stop()
+            self.board = parse_ggf(value)
+
+    async def _start(self, lines):
+        if self.board.current_player == 0:
+            await self.write('status game over')
+            return
+        await self._finish()
+        # Back-pressure: wait for a slot before reading the next command.
+        await self.pool.slots.acquire()
+        # The position and settings are those of the command, whatever
+        # arrives before the task runs.
+        self._task = asyncio.create_task(self._search(
+            self.board.copy(), self.time_limit, self.depth, lines))
+
+    async def _search(self, board, time_limit, depth, lines):
+        try:
+            result = await self.pool.search(self.id, board, time_limit,
+                                            depth, lines)
+            if 'move' not in result:
+                await self.write('status error ' +
+                                 result.get('error', 'search cancelled'))
+                return
+            if lines:
+                for line in result['lines']:
+                    await self.write('search %s %.2f 0 %d' % (
+                        ''.join(line['pv']), _search_eval(line['score']),
+                        line['depth']))
+                await self.write('status')
+                return
+            move = 'PA' if result['move'] is None else result['move']
+            await self.write('=== %s/%.2f/%.3f' % (
+                move, _eval(result), result['seconds']))
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self.pool.slots.release()
+
+
+async def serve_stdio(pool, **settings):
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader()
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader),
+                                 sys.stdin)
+
+    async def write(text):
+        sys.stdout.write(text + '\n')
+        sys.stdout.flush()
+    await Session(pool, write, **settings).run(reader.readline)
+
+
+async def serve_tcp(pool, host, port, **settings):
+    async def connected(reader, writer):
+        async def write(text):
+            writer.write(text.encode() + b'\n')
+            await writer.drain()
+        try:
+            await Session(pool, write, **settings).run(reader.readline)
+        except (ConnectionError, asyncio.CancelledError):
+            # A dropped client, or a session still closing at shutdown.
+            pass
+        finally:
+            writer.close()
+    return await asyncio.start_server(connected, host, port)
+
+
+async def _main(args):
+    pool = EnginePool(args.workers, args.queue, table_mb=args.table_mb)
+    pool.start()
+    settings = {'time_limit': args.time, 'depth': args.depth}
+    try:
+        if args.tcp:
+            host, _, port = args.tcp.rpartition(':')
+            server = await serve_tcp(pool, host or '127.0.0.1', int(port),
+                                     **settings)
+            async with server:
+                await server.serve_forever()
+        else:
+            await serve_stdio(pool, **settings)
+    finally:
+        pool.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='NBoard engine server.')
+    parser.add_argument('--tcp', metavar='HOST:PORT',
+                        help='serve TCP connections instead of stdin')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--queue', type=int, default=4,
+                        help='searches admitted beyond the workers')
+    parser.add_argument('--time', type=float, default=1.0,
+                        help='default time limit per search')
+    parser.add_argument('--depth', type=int, default=5)
+    parser.add_argument('--table-mb', type=int, default=16)
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(_main(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
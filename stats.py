@@ -0,0 +1,136 @@
+import argparse
+import cProfile
+import io
+import json
+import pstats
+from time import perf_counter
+
+from othelloboard import SQUARES
+
+
+class SearchStats(object):
+    # What one search did. Ai keeps the counters it needs anyway (nodes,
+    # leaf evaluations, cutoffs per move index), so collecting this only
+    # costs a snapshot at the start, one per finished iteration and one at
+    # the end.
+
+    def __init__(self, ai):
+        self.source = 'search'
+        self.score = None
+        self.seconds = 0
+        self.nodes = 0
+        self.leaf_evals = 0
+        self.solver_nodes = 0
+        self.probcuts = 0
+        self.cutoffs = []
+        self.iterations = []
+        self.table = None
+        self._start = perf_counter()
+        self._table_start = _table_counters(ai.table)
+        self._probcut_start = ai.probcut.cuts if ai.probcut else 0
+
+    @property
+    def depth(self):
+        return self.iterations[-1]['depth'] if self.iterations else 0
+
+    @property
+    def nodes_per_sec(self):
+        return self.nodes / self.seconds if self.seconds else 0.0
+
+    @property
+    def effective_branching_factor(self):
+        # Growth of the node count from the previous iteration to the last.
+        if len(self.iterations) < 2 or not self.iterations[-2]['nodes']:
+            return None
+        return self.iterations[-1]['nodes'] / self.iterations[-2]['nodes']
+
+    def iteration(self, ai, depth, score, move):
+        self.score = score
+        total = sum(iteration['nodes'] for iteration in self.iterations)
+        self.iterations.append({
+            'depth': depth, 'score': score,
+            'move': None if move is None else SQUARES[move],
+            'nodes': ai.nodes - total,
+            'seconds': perf_counter() - self._start})
+        return self.iterations[-1]
+
+    def finish(self, ai):
+        self.seconds = perf_counter() - self._start
+        self.nodes = ai.nodes
+        self.leaf_evals = ai.leaf_evals
+        if ai.probcut is not None:
+            self.probcuts = ai.probcut.cuts - self._probcut_start
+        cutoffs = ai.ordering.cutoff_indices
+        self.cutoffs = cutoffs[:max((i + 1 for i, n in enumerate(cutoffs)
+                                     if n), default=0)]
+        if ai.table is not None:
+            self.table = {name: value - start for name, value, start in zip(
+                ('hits', 'misses', 'occupied_misses'),
+                _table_counters(ai.table), self._table_start)}
+        return self
+
+    def as_dict(self):
+        return {'source': self.source, 'score': self.score,
+                'depth': self.depth,
+                'seconds': self.seconds, 'nodes': self.nodes,
+                'nodes_per_sec': self.nodes_per_sec,
+                'leaf_evals': self.leaf_evals,
+                'solver_nodes': self.solver_nodes,
+                'probcuts': self.probcuts,
+                'cutoffs_by_move_index': self.cutoffs,
+                'effective_branching_factor':
+                    self.effective_branching_factor,
+                'table': self.table, 'iterations': self.iterations}
+
+
+def _table_counters(table):
+    if table is None:
+        return None
+    return table.hits, table.misses, table.occupied_misses
+
+
+def profile_search(ai, path=None, limit=30, sort='cumulative', depth=None):
+    # Runs one search under cProfile: time_limit_move, or best_move at a
+    # fixed depth. The profile is dumped to path for pstats/snakeviz, and
+    # the top entries are returned as text with the chosen move.
+    profiler = cProfile.Profile()
+    if depth is None:
+        move = profiler.runcall(ai.time_limit_move)
+    else:
+        move = profiler.runcall(ai.best_move, depth)
+    if path is not None:
+        profiler.dump_stats(path)
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats(sort).print_stats(limit)
+    return move, out.getvalue()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Profile one search from a self-play position.')
+    parser.add_argument('--engine', default='time=1',
+                        help='engine settings as in selfplay.py')
+    parser.add_argument('--plies', type=int, default=20,
+                        help='random plies played before the search')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='file for the raw profile')
+    parser.add_argument('--limit', type=int, default=30)
+    args = parser.parse_args(argv)
+    from othelloboard import OthelloBoard
+    from selfplay import make_ai, parse_engine, random_opening
+    board = OthelloBoard()
+    for move in random_opening(args.plies, args.seed):
+        board.apply_move(move)
+    engine = parse_engine(args.engine)
+    ai = make_ai(board, board.current_player, engine)
+    try:
+        move, text = profile_search(ai, args.output, args.limit,
+                                    depth=engine.get('depth'))
+    finally:
+        ai.close()
+    print(text)
+    print(json.dumps(dict(ai.stats.as_dict(), move=move), indent=1))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+from array import array
+
+EXACT = 1
+LOWER = 2
+UPPER = 3
+
+# Bytes per entry: key, value, depth, bound, best move and age.
+_ENTRY_BYTES = 8 + 8 + 1 + 1 + 1 + 1
+
+
+class TranspositionTable(object):
+
+    def __init__(self, size_mb=16):
+        entries = max(2, int(size_mb * 2**20) // _ENTRY_BYTES)
+        buckets = 1
+        while buckets * 4 <= entries:
+            buckets *= 2
+        # Each bucket holds two entries: slot 0 is depth-preferred and
+        # slot 1 is always replaced.
+        self._mask = buckets - 1
+        self.clear()
+
+    def __len__(self):
+        return len(self._keys)
+
+    def new_search(self):
+        self.age = (self.age + 1) & 0xFF
+
+    def clear(self):
+        entries = 2 * (self._mask + 1)
+        self._keys = array('Q', bytes(8 * entries))
+        self._values = array('d', bytes(8 * entries))
+        self._depths = array('b', bytes(entries))
+        self._bounds = array('b', bytes(entries))
+        self._moves = array('b', bytes(entries))
+        self._ages = array('B', bytes(entries))
+        self.age = 0
+        self.hits = 0
+        self.misses = 0
+        self.occupied_misses = 0
+
+    def probe(self, key):
+        slot = (key & self._mask) << 1
+        for i in (slot, slot + 1):
+            if self._keys[i] == key and self._bounds[i]:
+                self.hits += 1
+                return (self._depths[i], self._values[i], self._bounds[i],
+                        self._moves[i])
+        self.misses += 1
+        # A miss where the bucket holds other positions: this one was
+        # replaced or never stored, not a clash of full keys.
+        if self._bounds[slot] or self._bounds[slot + 1]:
+            self.occupied_misses += 1
+        return None
+
+    def store(self, key, depth, value, bound, move):
+        slot = (key & self._mask) << 1
+        if (self._keys[slot] == key or not self._bounds[slot] or
+                self._ages[slot] != self.age or
+                depth >= self._depths[slot]):
+            i = slot
+        else:
+            i = slot + 1
+        self._keys[i] = key
+        self._values[i] = value
+        self._depths[i] = depth
+        self._bounds[i] = bound
+        self._moves[i] = -1 if move is None else move
+        self._ages[i] = self.age
+
+    def stats(self):
+        used = sum(1 for bound in self._bounds if bound)
+        return {'entries': len(self), 'used': used, 'hits': self.hits,
+                'misses': self.misses,
+                'occupied_misses': self.occupied_misses}